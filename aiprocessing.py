@@ -1,8 +1,14 @@
+import hashlib
 from typing import List, Optional, Tuple, Union
 import pandas as pd
 import numpy as np
 import streamlit as st
 from preprocessing import Preprocessing
+from hyperparameter_search import HyperparameterSearch
+from scoring import ScoringArtifact
+from incremental import INCREMENTAL_MODELS, IncrementalTrainer
+from knn_index import FaissKNeighborsClassifier, benchmark_against_exact
+from memory import load_frame
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from models import TBPrimaryActions, TBAiActions  # Importar as classes do banco de dados
@@ -31,6 +37,8 @@ class AiProcessing:
         self.ai: Optional[str] = None
         self.normalized_data: Optional[pd.DataFrame] = processed_data
         self.target_column: Optional[str] = None
+        self.search_budget: Optional[float] = None
+        self.ann_params: dict = {}
 
     def run(self) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
         """
@@ -48,6 +56,7 @@ class AiProcessing:
                     numerical_df: pd.DataFrame = self.data.select_dtypes(exclude=['object'])
                     preprocessing = Preprocessing(self.data)
                     final_data: pd.DataFrame = preprocessing.preprocess_categorical_data(self.data, numerical_df)
+                    st.session_state['preprocessing_state'] = preprocessing.fitted_state()
                     self.data = final_data
                     return final_data, method
             return None, None
@@ -65,6 +74,7 @@ class AiProcessing:
             preprocessing = Preprocessing(self.data)
             processed_data: pd.DataFrame = preprocessing.run()
             if processed_data is not None:
+                st.session_state['preprocessing_state'] = preprocessing.fitted_state()
                 st.write('Dados pré-processados!')
             return processed_data
         except Exception as e:
@@ -76,13 +86,16 @@ class AiProcessing:
         Método genérico para executar a regressão.
         """
         try:
+            if self.__select_training_mode() == 'Incremental':
+                self.__incremental_training(is_regression=True)
+                return
             data_to_use: pd.DataFrame = self.normalized_data if self.normalized_data is not None else self.data
             self.ai = st.selectbox('Selecione um modelo de regressão:', 
                                    ('', 'Linear Regression', 'SVR', 'Random Forest'))
             self.target_column = st.selectbox('Selecione a coluna alvo para a regressão:', data_to_use.columns)
             
             if self.ai:
-                model = self.__get_model()
+                model = self.__get_model(is_regression=True)
                 self.__train_and_evaluate(model, is_regression=True)
         except Exception as e:
             st.error(f"Erro na regressão: {e}")
@@ -93,30 +106,106 @@ class AiProcessing:
         """
         try:
             st.subheader('Modelos de Classificação Disponíveis:')
+            if self.__select_training_mode() == 'Incremental':
+                self.__incremental_training(is_regression=False)
+                return
             data_to_use: pd.DataFrame = self.normalized_data if self.normalized_data is not None else self.data
 
             self.target_column = st.selectbox('Selecione a coluna alvo para a classificação:', data_to_use.columns)
             self.ai = st.selectbox('Selecione um modelo de classificação:', 
-                                   ('', 'Logistic Regression', 'KNN', 'Random Forest', 'Decision Tree'))
+                                   ('', 'Logistic Regression', 'KNN', 'KNN (FAISS)', 'Random Forest', 'Decision Tree'))
+            if self.ai == 'KNN (FAISS)':
+                self.__select_ann_options()
 
             if self.ai:
-                model = self.__get_model()
+                model = self.__get_model(is_regression=False)
                 self.__train_and_evaluate(model, is_regression=False)
         except Exception as e:
             st.error(f"Erro na classificação: {e}")
 
-    def __get_model(self) -> Union[LinearRegression, SVR, RandomForestRegressor, LogisticRegression, KNeighborsClassifier, RandomForestClassifier, DecisionTreeClassifier]:
+    def __select_training_mode(self) -> str:
+        """
+        Exibe a seleção do modo de treinamento e, na busca de hiperparâmetros, o orçamento de tempo.
+        :return: Modo de treinamento selecionado.
+        """
+        mode: str = st.selectbox('Modo de treinamento:', ('Padrão', 'Busca de hiperparâmetros', 'Incremental'))
+        if mode == 'Busca de hiperparâmetros':
+            self.search_budget = float(st.number_input('Orçamento de tempo da busca (segundos):',
+                                                       min_value=5, max_value=3600, value=60, step=5))
+        else:
+            self.search_budget = None
+        return mode
+
+    def __select_ann_options(self) -> None:
+        """
+        Exibe as opções do índice de vizinhos mais próximos usado pelo KNN (FAISS).
+        """
+        index_types = {'HNSW (grafo)': 'hnsw', 'IVF (listas invertidas)': 'ivf', 'Flat (exato)': 'flat'}
+        index_label: str = st.selectbox('Tipo de índice:', tuple(index_types))
+        n_neighbors: int = int(st.number_input('Número de vizinhos:', min_value=1, max_value=100, value=5))
+        n_components: int = int(st.number_input('Dimensões após PCA (0 para não reduzir):', min_value=0, value=0, step=8))
+        self.ann_params = {
+            'index_type': index_types[index_label],
+            'n_neighbors': n_neighbors,
+            'n_components': n_components or None,
+        }
+
+    def __incremental_training(self, is_regression: bool) -> None:
+        """
+        Atualiza um modelo incremental salvo usando apenas as linhas novas ou alteradas da base atual.
+        :param is_regression: Booleano indicando se o modelo é de regressão (True) ou classificação (False).
+        """
+        try:
+            paradigm: str = 'Regressão' if is_regression else 'Classificação'
+            series_name: str = st.text_input('Nome da série de versões da base:',
+                                             value=st.session_state.get('dataset_name', 'Desconhecido'))
+            # O histórico de versões é sempre calculado sobre a base completa, mesmo no modo de amostragem
+            full_data: pd.DataFrame = load_frame('data')
+            self.target_column = st.selectbox('Selecione a coluna alvo:', full_data.columns)
+            self.ai = st.selectbox('Selecione um modelo incremental:', ('', *INCREMENTAL_MODELS[paradigm].keys()))
+            if not self.ai:
+                return
+
+            trainer = IncrementalTrainer(series_name, self.ai, self.target_column, is_regression)
+            snapshot = trainer.load_snapshot()
+            if snapshot is not None:
+                st.write(f"Versão atual do modelo: {snapshot.version}")
+
+            if st.button('Treinar incrementalmente'):
+                with st.spinner('Atualizando o modelo com as linhas novas ou alteradas...'):
+                    st.session_state['incremental_metrics'] = {'path': trainer.path, 'metrics': trainer.update(full_data)}
+
+            cached = st.session_state.get('incremental_metrics')
+            if cached is not None and cached['path'] == trainer.path:
+                metrics: dict = cached['metrics']
+                st.write(f"Versão {metrics['version']}: {metrics['delta_rows']} linhas novas ou alteradas "
+                         f"de {metrics['total_rows']}, {metrics['new_categories']} categorias novas")
+                st.write('Histórico de versões:')
+                st.dataframe(pd.DataFrame(metrics['history']), use_container_width=True)
+                if st.button('Salvar Dados'):
+                    self.__save_metrics_to_db(metrics)
+        except Exception as e:
+            st.error(f"Erro no treinamento incremental: {e}")
+
+    def __get_model(self, is_regression: bool) -> Union[LinearRegression, SVR, RandomForestRegressor, LogisticRegression, KNeighborsClassifier, RandomForestClassifier, DecisionTreeClassifier]:
         """
         Retorna o modelo de IA baseado na escolha do usuário.
+        :param is_regression: Booleano indicando se o modelo é de regressão (True) ou classificação (False).
         :return: Instância do modelo de IA selecionado.
         """
         try:
+            # 'Random Forest' existe nos dois paradigmas, por isso os modelos são separados
+            if is_regression:
+                models = {
+                    'Linear Regression': LinearRegression(),
+                    'SVR': SVR(),
+                    'Random Forest': RandomForestRegressor(),
+                }
+                return models[self.ai]
             models = {
-                'Linear Regression': LinearRegression(),
-                'SVR': SVR(),
-                'Random Forest': RandomForestRegressor(),
                 'Logistic Regression': LogisticRegression(),
                 'KNN': KNeighborsClassifier(),
+                'KNN (FAISS)': FaissKNeighborsClassifier(**self.ann_params),
                 'Random Forest': RandomForestClassifier(),
                 'Decision Tree': DecisionTreeClassifier()
             }
@@ -152,6 +241,11 @@ class AiProcessing:
             X, y = self.__split_data()
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
+            search_summary: Optional[dict] = None
+            if self.search_budget is not None:
+                search_summary = self.__search_hyperparameters(model, X_train, y_train, is_regression)
+                model.set_params(**search_summary['best_params'])
+
             model.fit(X_train, y_train)
             predictions: np.ndarray = model.predict(X_test)
 
@@ -167,6 +261,12 @@ class AiProcessing:
             # Adicionar resultados e predições aos dados das métricas
             metrics['real_values'] = y_test.tolist()
             metrics['predictions'] = predictions.tolist()
+            if search_summary is not None:
+                metrics['hyperparameter_search'] = search_summary
+            if isinstance(model, FaissKNeighborsClassifier):
+                benchmark = self.__benchmark_ann(model, X_train, y_train, X_test, y_test)
+                if benchmark is not None:
+                    metrics['ann_benchmark'] = benchmark
 
             # Exibir os resultados
             results_df: pd.DataFrame = pd.DataFrame({'Real': y_test, 'Predição': predictions})
@@ -176,9 +276,108 @@ class AiProcessing:
             
             if st.button('Salvar Dados'):
                 self.__save_metrics_to_db(metrics)
+            if st.button('Salvar Modelo'):
+                self.__save_model(model, X.columns.tolist())
 
         except Exception as e:
             st.error(f"Erro durante o treinamento e avaliação: não é possível realizar a {'Regressão' if is_regression else 'Classificação'} na coluna {y.name}")
+
+    def __search_hyperparameters(self, model, X_train: pd.DataFrame, y_train: pd.Series, is_regression: bool) -> dict:
+        """
+        Executa a busca de hiperparâmetros e exibe o melhor resultado e o histórico.
+        O resultado fica em cache na sessão para não repetir a busca a cada interação da página.
+        :return: Resumo da busca com a melhor configuração e o histórico de avaliações.
+        """
+        cache_key = (self.ai, self.search_budget, *self.__cache_key(model, X_train, y_train))
+        cached = st.session_state.get('hyperparameter_search')
+        if cached is not None and cached['key'] == cache_key:
+            summary = cached['summary']
+        else:
+            try:
+                with st.spinner('Buscando hiperparâmetros...'):
+                    search = HyperparameterSearch(model, is_regression, time_budget=self.search_budget)
+                    summary = search.fit(X_train, y_train).summary()
+            except ValueError as e:
+                st.error(f"Erro na busca de hiperparâmetros: {e}")
+                raise e
+            st.session_state['hyperparameter_search'] = {'key': cache_key, 'summary': summary}
+
+        st.write('Melhor configuração:', summary['best_params'])
+        st.write(f"Busca encerrada em {summary['elapsed']}s ({summary['stop_reason']})")
+        trace_df: pd.DataFrame = pd.DataFrame(summary['trace'])
+        if not trace_df.empty:
+            trace_df['params'] = trace_df['params'].astype(str)
+            st.dataframe(trace_df, use_container_width=True)
+        return summary
+
+    def __benchmark_ann(self, model: FaissKNeighborsClassifier, X_train: pd.DataFrame, y_train: pd.Series,
+                        X_test: pd.DataFrame, y_test: pd.Series) -> Optional[dict]:
+        """
+        Compara o KNN aproximado com o KNN exato quando o usuário pede e exibe o resultado.
+        O KNN exato percorre toda a base de treino, então só roda pelo botão; o resultado fica em
+        cache na sessão para não repeti-lo a cada interação da página.
+        :return: Acurácias, concordância e tempos de predição dos dois métodos, ou None se não houver comparação.
+        """
+        cache_key = self.__cache_key(model, X_train, y_train)
+        cached = st.session_state.get('ann_benchmark')
+        if cached is not None and cached['key'] == cache_key:
+            benchmark = cached['benchmark']
+        elif st.button('Comparar com o KNN exato'):
+            with st.spinner('Comparando com o KNN exato...'):
+                benchmark = benchmark_against_exact(model, X_train, y_train, X_test, y_test)
+            st.session_state['ann_benchmark'] = {'key': cache_key, 'benchmark': benchmark}
+        else:
+            return None
+
+        st.write('Comparação com o KNN exato:')
+        st.dataframe(pd.DataFrame([
+            {'Método': 'KNN (FAISS)', 'Acurácia': benchmark['ann_accuracy'], 'Tempo de predição (s)': benchmark['ann_predict_seconds']},
+            {'Método': 'KNN exato', 'Acurácia': benchmark['exact_accuracy'], 'Tempo de predição (s)': benchmark['exact_predict_seconds']},
+        ]), use_container_width=True)
+        st.write(f"Concordância entre as predições: {benchmark['agreement']:.2%} ({benchmark['rows']} linhas de teste)")
+        return benchmark
+
+    def __cache_key(self, model, X_train: pd.DataFrame, y_train: pd.Series) -> tuple:
+        """
+        Chave de cache de resultados que dependem do modelo e dos dados de treino.
+        O conteúdo dos dados e os parâmetros do modelo entram na chave: outro scaler ou outro índice FAISS geram outra chave.
+        :return: Coluna alvo, formato e digest dos dados e parâmetros do modelo.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(pd.util.hash_pandas_object(X_train).to_numpy().tobytes())
+        digest.update(pd.util.hash_pandas_object(y_train).to_numpy().tobytes())
+        model_params = tuple(sorted((name, repr(value)) for name, value in model.get_params().items()))
+        return self.target_column, X_train.shape, digest.hexdigest(), model_params
+
+    def __save_model(self, model, feature_columns: List[str]) -> None:
+        """
+        Salva o modelo treinado junto com o pré-processamento ajustado para pontuação em lote.
+        :param model: Modelo treinado.
+        :param feature_columns: Colunas de entrada do modelo, na ordem do treinamento.
+        """
+        try:
+            preprocessing_state = st.session_state.get('preprocessing_state')
+            if preprocessing_state is None:
+                st.error("Estado do pré-processamento não encontrado. Refaça o pré-processamento antes de salvar o modelo.")
+                return
+            artifact = ScoringArtifact(
+                model=model,
+                target_column=self.target_column,
+                feature_columns=feature_columns,
+                preprocessing_state=preprocessing_state,
+                model_name=self.ai,
+                dataset_name=st.session_state.get('dataset_name', 'Desconhecido'),
+            )
+            missing = artifact.missing_features()
+            if missing:
+                st.error(f"O pré-processamento salvo não gera as colunas {missing} usadas pelo modelo. "
+                         f"Refaça o pré-processamento dos dados usados no treino antes de salvar o modelo.")
+                return
+            path = artifact.save()
+            st.write(f"Modelo salvo em {path}")
+        except Exception as e:
+            st.error(f"Erro ao salvar o modelo: {e}")
+
     def __save_metrics_to_db(self, metrics: dict) -> None:
         """
         Salva as métricas no banco de dados.
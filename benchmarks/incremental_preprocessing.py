@@ -0,0 +1,88 @@
+"""
+Compara o pré-processamento completo com o incremental numa nova versão com poucas linhas alteradas.
+
+Uso: python benchmarks/incremental_preprocessing.py [linhas] [linhas alteradas]
+"""
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CLEANING_METHODS = [
+    ['nenhum'],
+    ['Remover linhas com valores nulos', 'Remover linhas duplicadas'],
+    ['Remover linhas com valores nulos', 'Remover linhas duplicadas', 'Remover ruídos'],
+]
+
+
+def make_versions(n_rows: int, n_changed: int):
+    rng = np.random.default_rng(0)
+    v1 = pd.DataFrame({
+        'id': np.arange(n_rows),
+        'valor': rng.normal(1000, 50, n_rows),
+        'area': rng.normal(200, 30, n_rows),
+        'idade': rng.integers(18, 80, n_rows),
+        'estado': rng.choice(['PR', 'SC', 'RS', 'SP'], n_rows).astype(object),
+        'cultura': rng.choice([f"cultura_{i}" for i in range(20)], n_rows).astype(object),
+    })
+    v2 = v1.copy()
+    changed = rng.choice(n_rows, n_changed, replace=False)
+    v2.loc[changed, 'valor'] += 1
+    v2.loc[changed[:n_changed // 2], 'cultura'] = 'cultura_nova'
+    return v1, v2
+
+
+def best_of(runs: int, function) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    n_changed = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    os.chdir(tempfile.mkdtemp())
+    import streamlit as st
+    from sklearn.preprocessing import StandardScaler
+    from preprocessing import Preprocessing
+    from versioning import DatasetLineage, IncrementalPreprocessing
+
+    v1, v2 = make_versions(n_rows, n_changed)
+    print(f"{n_rows} linhas, {n_changed} alteradas")
+    # A saída do Streamlit fica de fora da medição do caminho completo
+    with mock.patch.object(st, 'write'), mock.patch.object(st, 'dataframe'):
+        for methods in CLEANING_METHODS:
+            lineage = DatasetLineage(f"benchmark_{len(methods)}.csv")
+            versions = [lineage.register(df) for df in (v1, v2)]
+            incremental = IncrementalPreprocessing(lineage.dataset_name, versions[1].key_column,
+                                                   'StandardScaler', methods)
+            incremental.run(v1, versions[0].version, StandardScaler())
+
+            def full() -> None:
+                preprocessing = Preprocessing(v2)
+                preprocessing.scaler = 'StandardScaler'
+                preprocessing.cleaning_methods = methods
+                preprocessing._Preprocessing__apply_preprocessing()
+
+            full_seconds = best_of(3, full)
+            # A primeira execução reaproveita a versão anterior; as seguintes, a própria versão em cache
+            start = time.perf_counter()
+            incremental.run(v2, versions[1].version, StandardScaler())
+            delta_seconds = time.perf_counter() - start
+            cached_seconds = best_of(3, lambda: incremental.run(v2, versions[1].version, StandardScaler()))
+            print(f"{' + '.join(methods):<75} completo {full_seconds:6.2f}s | "
+                  f"incremental {delta_seconds:6.2f}s ({full_seconds / delta_seconds:4.1f}x) | "
+                  f"mesma versão {cached_seconds:6.2f}s")
+
+
+if __name__ == '__main__':
+    main()
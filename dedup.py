@@ -0,0 +1,284 @@
+import hashlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+EXACT = 'Exata'
+NEAR = 'Aproximada (MinHash/LSH)'
+
+# Número de funções de hash da assinatura MinHash, dividida em bandas pelo LSH
+NUM_PERM = 64
+# Baldes do LSH maiores que isso são ligados apenas ao primeiro elemento, para não gerar pares quadráticos
+MAX_BUCKET_PAIRS = 32
+CHUNK_ROWS = 100_000
+
+_MASK = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """
+    Finalizador do splitmix64: espalha os bits de cada valor uint64 (com overflow modular).
+    """
+    with np.errstate(over='ignore'):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return (x ^ (x >> np.uint64(31))) & _MASK
+
+
+def _salt(name: str) -> np.uint64:
+    return np.uint64(int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), 'little'))
+
+
+def lsh_bands(threshold: float, num_perm: int = NUM_PERM, recall: float = 0.95) -> Tuple[int, int]:
+    """
+    Escolhe o número de bandas e de linhas por banda do LSH. Entre as divisões da assinatura em que
+    um par com Jaccard igual ao limiar vira candidato com probabilidade `recall`, usa a de bandas mais
+    longas, que gera menos candidatos a confirmar.
+
+    Returns:
+        Tuple[int, int]: Número de bandas e de linhas por banda.
+    """
+    options = [(num_perm // rows, rows) for rows in range(num_perm, 0, -1) if num_perm % rows == 0]
+    for bands, rows in options:
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return options[-1]
+
+
+class DuplicateDetector:
+    """
+    Detecta linhas duplicadas a partir de um hash de 64 bits por linha sobre as colunas escolhidas.
+
+    No modo exato, o mesmo hash serve para contar e remover as duplicadas. No modo aproximado,
+    cada linha é tratada como o conjunto de pares coluna=valor; assinaturas MinHash divididas em
+    bandas (LSH) geram pares candidatos sem comparar todas as linhas entre si, e cada par é
+    confirmado pela fração real de colunas iguais. Pares confirmados são unidos em grupos por
+    componentes conexos, então um grupo pode reunir linhas ligadas por uma cadeia de semelhanças.
+    Dentro de cada grupo, uma linha só é removida se tiver um par confirmado com uma linha mantida;
+    as demais passam a ser mantidas também.
+
+    Args:
+        columns (Optional[List[str]]): Colunas comparadas, ou None para usar todas.
+        mode (str): EXACT ou NEAR.
+        threshold (float): No modo aproximado, fração mínima de colunas com o mesmo valor.
+        num_perm (int): Tamanho da assinatura MinHash.
+        random_state (int): Semente das funções de hash do MinHash.
+    """
+
+    def __init__(self, columns: Optional[List[str]] = None, mode: str = EXACT, threshold: float = 0.8,
+                 num_perm: int = NUM_PERM, random_state: int = 42) -> None:
+        self.columns: Optional[List[str]] = columns
+        self.mode: str = mode
+        self.threshold: float = threshold
+        self.num_perm: int = num_perm
+        self.random_state: int = random_state
+        self.labels_: np.ndarray = np.array([], dtype=np.int64)
+        self.representative_: np.ndarray = np.array([], dtype=np.int64)
+        self.duplicated_: np.ndarray = np.array([], dtype=bool)
+        self.index_: pd.Index = pd.Index([])
+
+    def fit(self, df: pd.DataFrame) -> 'DuplicateDetector':
+        """
+        Agrupa as linhas duplicadas do DataFrame.
+
+        Args:
+            df (pd.DataFrame): Dados a serem analisados.
+
+        Returns:
+            DuplicateDetector: A própria instância, com labels_ (grupo de cada linha),
+            representative_ (posição da linha mantida à qual cada linha foi atribuída) e
+            duplicated_ (linhas a remover) preenchidos.
+        """
+        columns = self.columns or df.columns.tolist()
+        self.index_ = df.index
+
+        # Cada coluna é fatorada uma única vez; os códigos alimentam o hash de linha e os tokens do MinHash
+        codes = np.empty((len(df), len(columns)), dtype=np.uint64, order='F')
+        for position, col in enumerate(columns):
+            codes[:, position] = pd.factorize(df[col])[0].astype(np.int64).view(np.uint64)
+        row_hash = np.zeros(len(df), dtype=np.uint64)
+        for position, col in enumerate(columns):
+            row_hash = _mix(row_hash ^ (codes[:, position] + _salt(str(col))))
+
+        # O mesmo hash de 64 bits por linha serve para contar e para remover as duplicadas exatas.
+        # O factorize numera os grupos pela ordem da primeira linha de cada um
+        labels, uniques = pd.factorize(row_hash)
+        representatives = np.flatnonzero(~pd.Series(labels).duplicated().to_numpy())
+        # Grupo exato ao qual cada grupo exato é atribuído; sem o modo aproximado, ele mesmo
+        owners = np.arange(len(uniques))
+        if self.mode == NEAR and len(uniques) > 1:
+            near_labels, edges = self.__near_duplicate_labels(codes[representatives], columns)
+            owners = self.__assign_owners(edges, len(representatives))
+            self.labels_ = pd.factorize(near_labels[labels])[0]
+        else:
+            self.labels_ = labels
+
+        self.representative_ = representatives[owners[labels]]
+        self.duplicated_ = self.representative_ != np.arange(len(df))
+        return self
+
+    def drop(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Remove as duplicadas encontradas por `fit`, mantendo as linhas às quais elas foram atribuídas.
+        """
+        return df[~self.duplicated_]
+
+    def clusters(self, max_rows: int = 10) -> pd.DataFrame:
+        """
+        Relatório dos grupos com mais de uma linha, do maior para o menor.
+
+        Args:
+            max_rows (int): Número máximo de índices listados por grupo.
+
+        Returns:
+            pd.DataFrame: Grupo, tamanho, número de linhas removidas, linhas mantidas e índices das
+            linhas do grupo.
+        """
+        sizes = np.bincount(self.labels_) if len(self.labels_) else np.array([], dtype=np.int64)
+        groups = np.flatnonzero(sizes > 1)
+        if not len(groups):
+            return pd.DataFrame(columns=['Grupo', 'Tamanho', 'Removidas', 'Linhas mantidas', 'Linhas'])
+
+        # Só as linhas de grupos com mais de uma linha entram no relatório
+        rows = np.flatnonzero(sizes[self.labels_] > 1)
+        kept = rows[~self.duplicated_[rows]]
+        removed = np.bincount(self.labels_, weights=self.duplicated_, minlength=len(sizes)).astype(np.int64)
+        report = pd.DataFrame({
+            'Grupo': groups,
+            'Tamanho': sizes[groups],
+            'Removidas': removed[groups],
+            'Linhas mantidas': self.__group_rows(kept, groups, max_rows),
+            'Linhas': self.__group_rows(rows, groups, max_rows),
+        })
+        return report.sort_values('Tamanho', ascending=False, kind='stable').reset_index(drop=True)
+
+    def __group_rows(self, rows: np.ndarray, groups: np.ndarray, max_rows: int) -> List[list]:
+        """
+        Até `max_rows` índices de cada grupo, na ordem das linhas, separados por ordenação em vez de groupby.
+        """
+        labels = self.labels_[rows]
+        order = rows[np.argsort(labels, kind='stable')]
+        counts = np.bincount(labels, minlength=groups[-1] + 1)[groups]
+        starts = np.cumsum(counts) - counts
+        rank = np.arange(len(order)) - np.repeat(starts, counts)
+        index = self.index_.to_numpy()[order[rank < max_rows]]
+        return [chunk.tolist() for chunk in np.split(index, np.cumsum(np.minimum(counts, max_rows))[:-1])]
+
+    def __near_duplicate_labels(self, codes: np.ndarray, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Agrupa linhas sem duplicadas exatas por MinHash/LSH.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Grupo de cada linha e pares confirmados (menor posição primeiro).
+        """
+        n_rows, n_columns = codes.shape
+        # Cada valor vira um token distinto por coluna, de modo que valores iguais em colunas diferentes não coincidem
+        tokens = np.empty_like(codes)
+        for position, col in enumerate(columns):
+            tokens[:, position] = _mix(codes[:, position] ^ _salt(str(col)))
+
+        # Com k colunas e m iguais, o Jaccard dos conjuntos coluna=valor é m / (2k - m)
+        jaccard = self.threshold / (2 - self.threshold)
+        n_bands, band_rows = lsh_bands(jaccard, self.num_perm)
+        signatures = self.__minhash(tokens)
+
+        pairs: List[np.ndarray] = []
+        for band in range(n_bands):
+            keys = np.full(n_rows, _salt(f"banda-{band}"), dtype=np.uint64)
+            for position in range(band * band_rows, (band + 1) * band_rows):
+                keys = _mix(keys ^ signatures[:, position])
+            pairs.append(self.__bucket_pairs(keys))
+
+        # Pares repetidos entre bandas são confirmados uma única vez
+        pair_ids = np.unique(np.concatenate(pairs) @ np.array([n_rows, 1], dtype=np.int64))
+        candidates = np.column_stack([pair_ids // n_rows, pair_ids % n_rows])
+        matches = np.empty(len(candidates), dtype=bool)
+        for start in range(0, len(candidates), CHUNK_ROWS):
+            chunk = candidates[start:start + CHUNK_ROWS]
+            equal = (tokens[chunk[:, 0]] == tokens[chunk[:, 1]]).sum(axis=1)
+            matches[start:start + CHUNK_ROWS] = equal >= np.ceil(self.threshold * n_columns - 1e-9)
+        edges = candidates[matches]
+
+        graph = coo_matrix((np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])), shape=(n_rows, n_rows))
+        _, labels = connected_components(graph, directed=False)
+        return labels, edges
+
+    @staticmethod
+    def __assign_owners(edges: np.ndarray, n_rows: int) -> np.ndarray:
+        """
+        Atribui cada linha, na ordem das linhas, à primeira linha mantida anterior a ela com a qual
+        tem um par confirmado; se não houver nenhuma, a linha passa a ser mantida. Assim, uma linha
+        ligada ao grupo só por uma cadeia de semelhanças não é removida.
+
+        Só os vizinhos de cada linha no grafo de pares são consultados. Em vez de percorrer as linhas
+        uma a uma, cada rodada decide de uma vez todas as linhas cujo primeiro vizinho anterior não
+        removido já está decidido; o número de rodadas é a profundidade das cadeias, não o de linhas.
+
+        Returns:
+            np.ndarray: Posição da linha mantida à qual cada linha foi atribuída.
+        """
+        # Cada linha aponta para os vizinhos de posição menor, em ordem crescente
+        earlier = csr_matrix((np.ones(len(edges), dtype=np.int8), (edges[:, 1], edges[:, 0])), shape=(n_rows, n_rows))
+        earlier.sort_indices()
+        indptr, indices = earlier.indptr, earlier.indices
+        degree = np.diff(indptr)
+
+        owners = np.arange(n_rows)
+        kept = degree == 0
+        removed = np.zeros(n_rows, dtype=bool)
+        pending = np.flatnonzero(~kept)
+        while len(pending):
+            counts = degree[pending]
+            row = np.repeat(np.arange(len(pending)), counts)
+            starts = np.cumsum(counts) - counts
+            neighbours = indices[np.arange(counts.sum()) - np.repeat(starts - indptr[pending], counts)]
+            alive = np.flatnonzero(~removed[neighbours])
+            first = np.full(len(pending), -1)
+            leaders = np.r_[True, row[alive][1:] != row[alive][:-1]] if len(alive) else np.array([], dtype=bool)
+            first[row[alive][leaders]] = neighbours[alive][leaders]
+            keep = first < 0
+            drop = ~keep & kept[first]
+            kept[pending[keep]] = True
+            removed[pending[drop]] = True
+            owners[pending[drop]] = first[drop]
+            pending = pending[~keep & ~drop]
+        return owners
+
+    def __minhash(self, tokens: np.ndarray) -> np.ndarray:
+        """
+        Assinatura MinHash de cada linha: o menor hash dos seus tokens para cada semente.
+        """
+        seeds = np.random.default_rng(self.random_state).integers(0, 2 ** 63, size=self.num_perm, dtype=np.uint64)
+        signatures = np.empty((len(tokens), self.num_perm), dtype=np.uint64)
+        for start in range(0, len(tokens), CHUNK_ROWS):
+            chunk = tokens[start:start + CHUNK_ROWS]
+            for position, seed in enumerate(seeds):
+                signatures[start:start + CHUNK_ROWS, position] = _mix(chunk ^ seed).min(axis=1)
+        return signatures
+
+    @staticmethod
+    def __bucket_pairs(keys: np.ndarray) -> np.ndarray:
+        """
+        Pares de linhas que caem no mesmo balde de uma banda, gerados de forma vetorizada.
+        """
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, len(keys)])
+        leader = np.repeat(order[starts], sizes)
+        offset = np.arange(len(keys)) - np.repeat(starts, sizes)
+
+        pairs = [np.column_stack([leader[offset > 0], order[offset > 0]])]
+        bucket_size = np.repeat(sizes, sizes)
+        for distance in range(1, min(MAX_BUCKET_PAIRS, int(sizes.max()))):
+            # Baldes pequenos geram todos os pares; os maiores ficam só com os pares ligados ao primeiro elemento
+            valid = np.flatnonzero((offset[:-distance] + distance < bucket_size[:-distance])
+                                   & (bucket_size[:-distance] <= MAX_BUCKET_PAIRS)
+                                   & (offset[:-distance] > 0))
+            pairs.append(np.column_stack([order[valid], order[valid + distance]]))
+
+        combined = np.concatenate(pairs)
+        return np.sort(combined, axis=1)
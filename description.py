@@ -2,13 +2,15 @@ import streamlit as st
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
-from typing import List
+from typing import List, Optional
 from preprocessing import Preprocessing
+from sampling import describe_with_confidence
 
 class Description:
-    def __init__(self, data: pd.DataFrame):
+    def __init__(self, data: pd.DataFrame, sample_info: Optional[dict] = None):
         self.data = data
         self.target_column = None
+        self.sample_info = sample_info
 
     def run(self) -> None:
         try:
@@ -24,7 +26,13 @@ class Description:
                 st.write("### Tipos de Dados")
                 st.write(self.data.dtypes)
                 st.write("### Estatísticas Descritivas")
+                if self.sample_info is not None:
+                    st.caption(f"Amostra de {self.sample_info['fraction']:.1%} da base "
+                               f"({self.sample_info['sample_rows']} de {self.sample_info['total_rows']} linhas)")
                 st.write(self.data.describe())
+                if self.sample_info is not None:
+                    st.write("### Intervalos de Confiança (95%) das Médias")
+                    st.write(describe_with_confidence(self.data, self.sample_info['total_rows']))
 
                 # Calcula e mostra a importância das features
                 feature_importance = self.__calculate_feature_importance()
@@ -0,0 +1,292 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import BaseEstimator, clone
+from sklearn.metrics import accuracy_score, mean_squared_error
+from sklearn.model_selection import ParameterGrid, ParameterSampler, train_test_split
+
+# Espaço de busca de cada modelo, indexado pelo nome da classe do estimador. Uma lista de
+# dicionários separa combinações que não devem ser cruzadas entre si
+SEARCH_SPACES: Dict[str, Union[Dict[str, List[Any]], List[Dict[str, List[Any]]]]] = {
+    'LinearRegression': {
+        'fit_intercept': [True, False],
+        'positive': [False, True],
+    },
+    'SVR': [
+        {
+            'C': [0.01, 0.1, 1.0, 10.0, 100.0],
+            'epsilon': [0.01, 0.1, 0.5, 1.0],
+            'kernel': ['rbf'],
+            'gamma': ['scale', 'auto'],
+        },
+        {
+            # O kernel linear com C alto leva minutos para convergir mesmo em poucas linhas
+            'C': [0.01, 0.1, 1.0],
+            'epsilon': [0.01, 0.1, 0.5, 1.0],
+            'kernel': ['linear'],
+        },
+    ],
+    'RandomForestRegressor': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [None, 5, 10, 20],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'max_features': [1.0, 'sqrt', 'log2'],
+    },
+    'LogisticRegression': {
+        'C': [0.01, 0.1, 1.0, 10.0, 100.0],
+        'max_iter': [200, 500, 1000],
+    },
+    'KNeighborsClassifier': {
+        'n_neighbors': [3, 5, 7, 11, 15, 21],
+        'weights': ['uniform', 'distance'],
+        'p': [1, 2],
+    },
+    'FaissKNeighborsClassifier': {
+        'n_neighbors': [3, 5, 7, 11, 15, 21],
+    },
+    'RandomForestClassifier': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [None, 5, 10, 20],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'max_features': ['sqrt', 'log2', None],
+    },
+    'DecisionTreeClassifier': {
+        'max_depth': [None, 3, 5, 10, 20],
+        'min_samples_leaf': [1, 2, 5, 10, 20],
+        'criterion': ['gini', 'entropy'],
+    },
+}
+
+
+def _evaluate_candidate(position: int, model: BaseEstimator, params: Dict[str, Any], X_train: pd.DataFrame,
+                        y_train: pd.Series, X_val: pd.DataFrame, y_val: pd.Series, is_regression: bool,
+                        deadline: float) -> Tuple[int, Optional[float], float]:
+    """
+    Treina uma configuração em um subconjunto de linhas e a avalia na validação.
+
+    Returns:
+        Tuple[int, Optional[float], float]: Posição da configuração na rodada, score (maior é melhor,
+        ou None se o tempo acabou) e tempo de treino.
+    """
+    if time.monotonic() >= deadline:
+        return position, None, 0.0
+    start = time.monotonic()
+    try:
+        estimator = clone(model).set_params(**params)
+        estimator.fit(X_train, y_train)
+        predictions = estimator.predict(X_val)
+    except Exception:
+        # Configurações inválidas para os dados (ex.: 'positive' com alvo negativo) são descartadas
+        return position, float('-inf'), time.monotonic() - start
+    if is_regression:
+        score = -mean_squared_error(y_val, predictions)
+    else:
+        score = accuracy_score(y_val, predictions)
+    return position, float(score), time.monotonic() - start
+
+
+class HyperparameterSearch:
+    """
+    Busca de hiperparâmetros por successive halving sobre subamostras de linhas.
+
+    Cada rodada avalia as configurações sobreviventes em paralelo com um número crescente
+    de linhas de treino e mantém apenas a fração 1/eta melhor. A busca termina quando resta
+    uma configuração, quando o orçamento de tempo acaba ou quando o melhor score para de melhorar.
+
+    O orçamento vale também para os treinos em andamento: a rodada recebe o tempo restante como
+    timeout dos processos, e uma rodada cujo custo estimado (o maior tempo de treino da rodada
+    anterior vezes eta) excede o tempo restante nem é iniciada.
+    """
+
+    def __init__(self, model: BaseEstimator, is_regression: bool, time_budget: float = 60.0,
+                 n_candidates: int = 16, eta: int = 3, min_resources: int = 500,
+                 patience: int = 2, tol: float = 1e-4, n_jobs: int = -1, random_state: int = 42) -> None:
+        self.model: BaseEstimator = model
+        self.is_regression: bool = is_regression
+        self.time_budget: float = time_budget
+        self.n_candidates: int = n_candidates
+        self.eta: int = eta
+        self.min_resources: int = min_resources
+        self.patience: int = patience
+        self.tol: float = tol
+        self.n_jobs: int = n_jobs
+        self.random_state: int = random_state
+        self.best_params_: Dict[str, Any] = {}
+        self.best_score_: Optional[float] = None
+        self.trace_: List[Dict[str, Any]] = []
+        self.stop_reason_: Optional[str] = None
+
+    @property
+    def search_space(self) -> Union[Dict[str, List[Any]], List[Dict[str, List[Any]]]]:
+        return SEARCH_SPACES.get(type(self.model).__name__, {})
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> 'HyperparameterSearch':
+        """
+        Executa a busca sobre os dados de treino.
+
+        Args:
+            X (pd.DataFrame): Features de treino.
+            y (pd.Series): Coluna alvo de treino.
+
+        Returns:
+            HyperparameterSearch: A própria instância, com best_params_, best_score_ e trace_ preenchidos.
+
+        Raises:
+            ValueError: Se nenhuma configuração puder ser treinada com os dados ou terminar dentro do
+            orçamento de tempo.
+        """
+        start = time.monotonic()
+        deadline = start + self.time_budget
+        self.trace_ = []
+        self.best_params_ = {}
+        self.best_score_ = None
+
+        candidates = self.__sample_candidates()
+
+        stratify = None if self.is_regression or y.value_counts().min() < 2 else y
+        X_search, X_val, y_search, y_val = train_test_split(
+            X, y, test_size=0.2, random_state=self.random_state, stratify=stratify
+        )
+        # Embaralha uma vez: as subamostras de cada rodada são prefixos aninhados desta ordem
+        order = np.random.default_rng(self.random_state).permutation(len(X_search))
+        X_search = X_search.iloc[order]
+        y_search = y_search.iloc[order]
+
+        n_rows = len(X_search)
+        n_rounds = max(1, int(np.ceil(np.log(len(candidates)) / np.log(self.eta)))) if len(candidates) > 1 else 1
+        resources = max(min(self.min_resources, n_rows), n_rows // (self.eta ** (n_rounds - 1)))
+
+        rounds_without_improvement = 0
+        rung = 0
+        while candidates:
+            resources = min(resources, n_rows)
+            results = self.__run_rung(candidates, X_search.iloc[:resources], y_search.iloc[:resources],
+                                      X_val, y_val, deadline)
+
+            scored: List[Tuple[float, Dict[str, Any]]] = []
+            fit_times: List[float] = []
+            for position, score, fit_time in sorted(results, key=lambda result: result[0]):
+                if score is None:
+                    continue
+                params = candidates[position]
+                self.trace_.append({
+                    'rung': rung,
+                    'n_rows': int(resources),
+                    'params': params,
+                    'score': score if np.isfinite(score) else None,
+                    'fit_time': round(fit_time, 4),
+                })
+                scored.append((score, params))
+                fit_times.append(fit_time)
+
+            if not scored:
+                self.stop_reason_ = 'time_budget'
+                break
+
+            scored.sort(key=lambda item: item[0], reverse=True)
+            rung_best_score, rung_best_params = scored[0]
+            if not np.isfinite(rung_best_score):
+                # Todas as configurações falharam; subamostras maiores não mudam isso
+                self.best_score_ = rung_best_score
+                self.best_params_ = rung_best_params
+                break
+            if self.best_score_ is None or rung_best_score > self.best_score_ + self.tol:
+                rounds_without_improvement = 0
+            else:
+                rounds_without_improvement += 1
+            # A melhor configuração é sempre a da maior subamostra avaliada
+            self.best_score_ = rung_best_score
+            self.best_params_ = rung_best_params
+
+            if len(scored) == 1 or resources >= n_rows:
+                self.stop_reason_ = 'completed'
+                break
+            if len(scored) < len(candidates) or time.monotonic() >= deadline:
+                self.stop_reason_ = 'time_budget'
+                break
+            if rounds_without_improvement >= self.patience:
+                self.stop_reason_ = 'early_stopping'
+                break
+            # A próxima rodada treina com eta vezes mais linhas; se nem o treino mais lento cabe no tempo, para aqui
+            if max(fit_times) * self.eta > deadline - time.monotonic():
+                self.stop_reason_ = 'time_budget'
+                break
+
+            keep = max(1, len(scored) // self.eta)
+            candidates = [params for _, params in scored[:keep]]
+            resources *= self.eta
+            rung += 1
+
+        self.elapsed_ = time.monotonic() - start
+        if self.best_score_ is None:
+            raise ValueError(
+                f"Nenhuma configuração de {type(self.model).__name__} terminou dentro do orçamento de "
+                f"{self.time_budget:g}s; aumente o orçamento de tempo da busca"
+            )
+        if not np.isfinite(self.best_score_):
+            raise ValueError(
+                f"Nenhuma configuração de {type(self.model).__name__} pôde ser treinada com estes dados "
+                f"(verifique se o modelo é adequado à coluna alvo)"
+            )
+        return self
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Resumo serializável em JSON da busca, para ser salvo junto às métricas.
+        """
+        best_score = self.best_score_
+        if best_score is not None and self.is_regression:
+            best_score = -best_score
+        return {
+            'best_params': self.best_params_,
+            'best_score': best_score,
+            'score_metric': 'mse' if self.is_regression else 'accuracy',
+            'time_budget': self.time_budget,
+            'elapsed': round(getattr(self, 'elapsed_', 0.0), 2),
+            'stop_reason': self.stop_reason_,
+            'trace': [
+                {**entry, 'score': -entry['score'] if self.is_regression and entry['score'] is not None else entry['score']}
+                for entry in self.trace_
+            ],
+        }
+
+    def __run_rung(self, candidates: List[Dict[str, Any]], X_train: pd.DataFrame, y_train: pd.Series,
+                   X_val: pd.DataFrame, y_val: pd.Series, deadline: float) -> List[Tuple[int, Optional[float], float]]:
+        """
+        Avalia as configurações de uma rodada em paralelo, com o tempo restante como timeout.
+        Se o tempo acabar, os processos em andamento são encerrados e só os resultados já
+        concluídos são retornados.
+        """
+        results: List[Tuple[int, Optional[float], float]] = []
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return results
+        # Com um único processo o joblib ignora o timeout; o prazo é verificado antes de cada treino
+        timeout = remaining if effective_n_jobs(self.n_jobs) > 1 else None
+        parallel = Parallel(n_jobs=self.n_jobs, prefer='processes', timeout=timeout,
+                            return_as='generator_unordered')
+        try:
+            for result in parallel(
+                delayed(_evaluate_candidate)(
+                    position, self.model, params, X_train, y_train, X_val, y_val, self.is_regression, deadline
+                )
+                for position, params in enumerate(candidates)
+            ):
+                results.append(result)
+        except TimeoutError:
+            pass
+        return results
+
+    def __sample_candidates(self) -> List[Dict[str, Any]]:
+        """
+        Sorteia as configurações iniciais do espaço de busca do modelo.
+        """
+        space = self.search_space
+        if not space:
+            return [{}]
+        grid_size = len(ParameterGrid(space))
+        n_iter = min(self.n_candidates, grid_size)
+        return list(ParameterSampler(space, n_iter=n_iter, random_state=self.random_state))
@@ -0,0 +1,291 @@
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier, SGDRegressor
+from sklearn.metrics import accuracy_score, mean_squared_error
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neural_network import MLPClassifier, MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+# Diretório onde os snapshots dos modelos incrementais são gravados
+SNAPSHOT_DIR = 'incremental_models'
+
+# Estimadores com suporte a `partial_fit`, indexados pelo paradigma
+INCREMENTAL_MODELS: Dict[str, Dict[str, Any]] = {
+    'Regressão': {
+        'SGD Regressor': lambda: SGDRegressor(random_state=42),
+        'MLP Regressor (mini-batch)': lambda: MLPRegressor(hidden_layer_sizes=(64,), random_state=42),
+    },
+    'Classificação': {
+        'SGD Classifier': lambda: SGDClassifier(loss='log_loss', random_state=42),
+        'Naive Bayes': lambda: GaussianNB(),
+        'MLP Classifier (mini-batch)': lambda: MLPClassifier(hidden_layer_sizes=(64,), random_state=42),
+    },
+}
+
+
+def row_hashes(df: pd.DataFrame, dtypes: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """
+    Calcula um hash de 64 bits por linha, independente do índice do DataFrame.
+
+    O hash depende do tipo da coluna (1 e 1.0 geram hashes diferentes), então cada coluna é
+    convertida antes para o tipo registrado em `dtypes`. Inteiros e booleanos usam os tipos
+    anuláveis do pandas, que geram o mesmo hash: um nulo numa nova exportação não muda as demais linhas.
+    """
+    if dtypes:
+        df = pd.DataFrame({col: _cast(df[col], dtypes.get(col)) for col in df.columns}, index=df.index)
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _cast(values: pd.Series, dtype: Any) -> pd.Series:
+    if dtype is None or values.dtype == dtype:
+        return values
+    if pd.api.types.is_bool_dtype(dtype):
+        dtype = 'boolean'
+    elif pd.api.types.is_integer_dtype(dtype):
+        dtype = 'Int64'
+    try:
+        return values.astype(dtype)
+    except (TypeError, ValueError):
+        # Valores que não cabem no tipo registrado (ex.: 1.5 numa coluna inteira) mudaram de fato
+        return values
+
+
+class ExtendableEncoder:
+    """
+    Codificador de features cujo vocabulário só cresce: categorias novas ganham colunas
+    ao final da matriz, preservando a posição das colunas já conhecidas pelo modelo.
+
+    O scaler é ajustado apenas com a primeira versão e depois fica congelado: se a média e a
+    escala mudassem a cada versão, os pesos já aprendidos passariam a receber entradas em outra
+    escala e a métrica prequencial mediria essa mudança, não o desempenho do modelo.
+    """
+
+    def __init__(self, numerical_columns: List[str], categorical_columns: List[str]) -> None:
+        self.numerical_columns: List[str] = numerical_columns
+        self.categorical_columns: List[str] = categorical_columns
+        self.vocabulary: Dict[str, Dict[str, int]] = {col: {} for col in categorical_columns}
+        self.feature_names: List[str] = list(numerical_columns)
+        self.scaler: StandardScaler = StandardScaler()
+
+    @property
+    def width(self) -> int:
+        return len(self.feature_names)
+
+    def update(self, df: pd.DataFrame) -> int:
+        """
+        Acrescenta ao vocabulário as categorias inéditas e, na primeira versão, ajusta o scaler.
+
+        Returns:
+            int: Quantidade de categorias novas.
+        """
+        new_categories = 0
+        for col in self.categorical_columns:
+            if col not in df.columns:
+                continue
+            known = self.vocabulary[col]
+            for value in pd.unique(self.__category_values(df[col])):
+                if value not in known:
+                    known[value] = len(self.feature_names)
+                    self.feature_names.append(f"{col}_{value}")
+                    new_categories += 1
+        if self.numerical_columns and not hasattr(self.scaler, 'n_samples_seen_'):
+            self.scaler.fit(self.__numerical_values(df))
+        return new_categories
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Converte um bloco de dados brutos na matriz de features. Categorias fora do vocabulário são ignoradas.
+        """
+        X = np.zeros((len(df), self.width), dtype=float)
+        n_numerical = len(self.numerical_columns)
+        if n_numerical:
+            X[:, :n_numerical] = self.scaler.transform(self.__numerical_values(df))
+        rows = np.arange(len(df))
+        for col in self.categorical_columns:
+            if col not in df.columns:
+                continue
+            positions = self.__category_values(df[col]).map(self.vocabulary[col]).to_numpy(dtype=float)
+            known = ~np.isnan(positions)
+            X[rows[known], positions[known].astype(int)] = 1.0
+        return X
+
+    @staticmethod
+    def __category_values(values: pd.Series) -> pd.Series:
+        return values.astype(object).fillna('nan').astype(str)
+
+    def __numerical_values(self, df: pd.DataFrame) -> np.ndarray:
+        numerical_df = df.reindex(columns=self.numerical_columns)
+        numerical_df = numerical_df.apply(lambda col: pd.to_numeric(col, errors='coerce'))
+        return numerical_df.fillna(0.0).to_numpy(dtype=float)
+
+
+def expand_model(model: Any, new_width: int) -> None:
+    """
+    Amplia os parâmetros de um modelo já treinado para novas colunas de features.
+
+    As novas colunas valem zero em todas as linhas já vistas, então pesos zero (modelos lineares
+    e MLP) ou média zero e variância mínima (Naive Bayes) equivalem exatamente ao que o modelo
+    teria aprendido se essas colunas existissem desde o início.
+    """
+    old_width = model.n_features_in_
+    pad = new_width - old_width
+    if pad <= 0:
+        return
+    if isinstance(model, GaussianNB):
+        model.theta_ = np.pad(model.theta_, ((0, 0), (0, pad)))
+        model.var_ = np.pad(model.var_, ((0, 0), (0, pad)), constant_values=model.epsilon_)
+    elif isinstance(model, (MLPClassifier, MLPRegressor)):
+        model.coefs_[0] = np.pad(model.coefs_[0], ((0, pad), (0, 0)))
+        # O estado do otimizador tem a forma antiga dos pesos e é recriado no próximo partial_fit
+        if hasattr(model, '_optimizer'):
+            del model._optimizer
+    else:
+        for attr in ('coef_', '_standard_coef', '_average_coef'):
+            value = getattr(model, attr, None)
+            if isinstance(value, np.ndarray) and value.shape[-1] == old_width:
+                widths = [(0, 0)] * (value.ndim - 1) + [(0, pad)]
+                setattr(model, attr, np.pad(value, widths))
+    model.n_features_in_ = new_width
+
+
+class IncrementalSnapshot:
+    """
+    Estado persistido de um modelo incremental: modelo, encoder, hashes das linhas
+    do último treino e histórico de métricas por versão.
+    """
+
+    def __init__(self, model: Any, encoder: ExtendableEncoder, classes: Optional[np.ndarray]) -> None:
+        self.model: Any = model
+        self.encoder: ExtendableEncoder = encoder
+        self.classes: Optional[np.ndarray] = classes
+        self.row_hashes: np.ndarray = np.array([], dtype=np.uint64)
+        # Tipo de cada coluna na primeira versão em que ela apareceu, usado no hash das linhas
+        self.dtypes: Dict[str, Any] = {}
+        self.version: int = 0
+        self.history: List[Dict[str, Any]] = []
+        self.is_fitted: bool = False
+
+
+class IncrementalTrainer:
+    """
+    Atualiza um modelo salvo apenas com as linhas novas ou alteradas de uma nova exportação.
+    """
+
+    def __init__(self, series_name: str, model_name: str, target_column: str, is_regression: bool,
+                 batch_size: int = 10_000) -> None:
+        self.series_name: str = series_name
+        self.model_name: str = model_name
+        self.target_column: str = target_column
+        self.is_regression: bool = is_regression
+        self.batch_size: int = batch_size
+
+    @property
+    def path(self) -> str:
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{self.series_name}_{self.model_name}_{self.target_column}")
+        return os.path.join(SNAPSHOT_DIR, f"{name}.joblib")
+
+    def load_snapshot(self) -> Optional[IncrementalSnapshot]:
+        if not os.path.exists(self.path):
+            return None
+        return joblib.load(self.path)
+
+    def update(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Detecta as linhas novas ou alteradas em relação ao último snapshot e treina o modelo só com elas.
+
+        A métrica é prequencial: cada bloco é avaliado pelo modelo antes de ser usado no treino.
+
+        Args:
+            df (pd.DataFrame): Exportação completa e atual da base.
+
+        Returns:
+            Dict[str, Any]: Métricas da nova versão do modelo.
+        """
+        snapshot = self.load_snapshot()
+        if snapshot is None:
+            snapshot = self.__new_snapshot(df)
+        if not hasattr(snapshot, 'dtypes'):
+            # Snapshots anteriores ao registro de tipos foram gerados com os tipos da própria exportação
+            snapshot.dtypes = {}
+        for col, dtype in df.dtypes.items():
+            snapshot.dtypes.setdefault(col, dtype)
+        hashes = row_hashes(df, snapshot.dtypes)
+
+        delta = df[~np.isin(hashes, snapshot.row_hashes)]
+        delta = delta[delta[self.target_column].notna()]
+
+        dropped_labels = 0
+        if not self.is_regression:
+            known_labels = np.isin(delta[self.target_column].to_numpy(), snapshot.classes)
+            dropped_labels = int((~known_labels).sum())
+            delta = delta[known_labels]
+
+        new_categories = snapshot.encoder.update(delta) if not delta.empty else 0
+        if snapshot.is_fitted:
+            expand_model(snapshot.model, snapshot.encoder.width)
+
+        predictions: List[np.ndarray] = []
+        real_values: List[np.ndarray] = []
+        for start in range(0, len(delta), self.batch_size):
+            batch = delta.iloc[start:start + self.batch_size]
+            X = snapshot.encoder.transform(batch)
+            y = batch[self.target_column].to_numpy()
+            if snapshot.is_fitted:
+                predictions.append(snapshot.model.predict(X))
+                real_values.append(y)
+            if self.is_regression:
+                snapshot.model.partial_fit(X, y.astype(float))
+            else:
+                snapshot.model.partial_fit(X, y, classes=snapshot.classes)
+            snapshot.is_fitted = True
+
+        snapshot.row_hashes = np.unique(hashes)
+        snapshot.version += 1
+        metrics = self.__version_metrics(snapshot, len(df), len(delta), new_categories, dropped_labels,
+                                         predictions, real_values)
+        snapshot.history.append(metrics)
+
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        joblib.dump(snapshot, self.path)
+        return {**metrics, 'history': snapshot.history}
+
+    def __new_snapshot(self, df: pd.DataFrame) -> IncrementalSnapshot:
+        features = df.drop(columns=[self.target_column])
+        numerical_columns = features.select_dtypes(exclude=['object']).columns.tolist()
+        categorical_columns = features.select_dtypes(include=['object']).columns.tolist()
+        encoder = ExtendableEncoder(numerical_columns, categorical_columns)
+        paradigm = 'Regressão' if self.is_regression else 'Classificação'
+        model = INCREMENTAL_MODELS[paradigm][self.model_name]()
+        # Estimadores incrementais exigem todas as classes já no primeiro partial_fit
+        classes = None if self.is_regression else np.unique(df[self.target_column].dropna().to_numpy())
+        return IncrementalSnapshot(model, encoder, classes)
+
+    def __version_metrics(self, snapshot: IncrementalSnapshot, total_rows: int, delta_rows: int,
+                          new_categories: int, dropped_labels: int, predictions: List[np.ndarray],
+                          real_values: List[np.ndarray]) -> Dict[str, Any]:
+        score: Optional[float] = None
+        evaluated_rows = int(sum(len(values) for values in real_values))
+        if evaluated_rows:
+            y_true = np.concatenate(real_values)
+            y_pred = np.concatenate(predictions)
+            if self.is_regression:
+                score = float(mean_squared_error(y_true.astype(float), y_pred))
+            else:
+                score = float(accuracy_score(y_true, y_pred))
+        return {
+            'version': snapshot.version,
+            'timestamp': datetime.utcnow().isoformat(),
+            'total_rows': int(total_rows),
+            'delta_rows': int(delta_rows),
+            'evaluated_rows': evaluated_rows,
+            'new_categories': int(new_categories),
+            'dropped_unknown_labels': dropped_labels,
+            'n_features': snapshot.encoder.width,
+            'mse' if self.is_regression else 'accuracy': score,
+        }
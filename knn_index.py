@@ -0,0 +1,196 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.decomposition import PCA
+from sklearn.metrics import accuracy_score
+from sklearn.neighbors import KNeighborsClassifier
+from memory import MB
+
+# Índices já construídos, indexados pela impressão digital dos dados de treino e dos parâmetros do índice
+MAX_CACHED_INDEXES = 4
+# Os índices guardam uma cópia dos dados de treino; o cache também é limitado pelo tamanho total (em MB)
+INDEX_CACHE_BUDGET_BYTES = int(os.environ.get('COOPERGEST_INDEX_CACHE_MB', '512')) * MB
+_index_cache: 'OrderedDict[str, Tuple[Optional[PCA], Any]]' = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def index_nbytes(index: Any) -> int:
+    """
+    Estimativa da memória ocupada por um índice FAISS: os vetores e, no HNSW, as ligações do grafo.
+    """
+    nbytes = index.ntotal * index.d * 4
+    if hasattr(index, 'hnsw'):
+        nbytes += index.ntotal * index.hnsw.nb_neighbors(0) * 4
+    return int(nbytes)
+
+
+def cached_index_bytes() -> int:
+    with _index_cache_lock:
+        return sum(index_nbytes(index) for _, index in _index_cache.values())
+
+
+def data_fingerprint(X: np.ndarray) -> str:
+    """
+    Impressão digital do conteúdo de uma matriz, usada como chave do cache de índices.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(X.shape).encode())
+    digest.update(np.ascontiguousarray(X).view(np.uint8))
+    return digest.hexdigest()
+
+
+class FaissKNeighborsClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Classificador KNN sobre um índice de vizinhos mais próximos do FAISS.
+
+    Args:
+        n_neighbors (int): Número de vizinhos usados na votação.
+        index_type (str): 'flat' (exato), 'ivf' (listas invertidas) ou 'hnsw' (grafo navegável).
+        n_components (Optional[int]): Dimensões mantidas pelo PCA antes da indexação, ou None para não reduzir.
+        nlist (Optional[int]): Número de listas do índice IVF; por padrão 4 * sqrt(n), limitado a n / 39.
+        nprobe (int): Listas visitadas em cada busca no índice IVF.
+        hnsw_m (int): Conexões por nó do grafo HNSW.
+        ef_search (int): Tamanho da fila de candidatos na busca HNSW.
+    """
+
+    def __init__(self, n_neighbors: int = 5, index_type: str = 'hnsw', n_components: Optional[int] = None,
+                 nlist: Optional[int] = None, nprobe: int = 8, hnsw_m: int = 32, ef_search: int = 64) -> None:
+        self.n_neighbors = n_neighbors
+        self.index_type = index_type
+        self.n_components = n_components
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+
+    def fit(self, X: Any, y: Any) -> 'FaissKNeighborsClassifier':
+        X = np.ascontiguousarray(X, dtype='float32')
+        self.classes_, self._y = np.unique(np.asarray(y), return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+
+        key = f"{data_fingerprint(X)}:{self.index_type}:{self.n_components}:{self.nlist}:{self.hnsw_m}"
+        with _index_cache_lock:
+            cached = _index_cache.get(key)
+            if cached is not None:
+                _index_cache.move_to_end(key)
+        self.index_from_cache_ = cached is not None
+        if cached is None:
+            cached = self.__build(X)
+            with _index_cache_lock:
+                _index_cache[key] = cached
+                # O índice recém-construído nunca é descartado; se sozinho exceder o orçamento, não fica em cache
+                while len(_index_cache) > 1 and (
+                        len(_index_cache) > MAX_CACHED_INDEXES
+                        or sum(index_nbytes(index) for _, index in _index_cache.values()) > INDEX_CACHE_BUDGET_BYTES):
+                    _index_cache.popitem(last=False)
+                if index_nbytes(cached[1]) > INDEX_CACHE_BUDGET_BYTES:
+                    del _index_cache[key]
+        self.pca_, self.index_ = cached
+        return self
+
+    def kneighbors(self, X: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna as distâncias e as posições dos vizinhos mais próximos de cada linha.
+        """
+        X = self.__project(np.ascontiguousarray(X, dtype='float32'))
+        # O índice fica em cache e é compartilhado entre sessões; os parâmetros de busca vão em cada consulta
+        params = None
+        if self.index_type == 'ivf':
+            params = faiss.SearchParametersIVF(nprobe=self.nprobe)
+        elif self.index_type == 'hnsw':
+            params = faiss.SearchParametersHNSW(efSearch=max(self.ef_search, self.n_neighbors))
+        return self.index_.search(X, min(self.n_neighbors, len(self._y)), params=params)
+
+    def predict(self, X: Any) -> np.ndarray:
+        _, neighbors = self.kneighbors(X)
+        valid = neighbors >= 0
+        labels = self._y[np.where(valid, neighbors, 0)]
+        votes = np.zeros((len(neighbors), len(self.classes_)), dtype=np.int64)
+        rows = np.broadcast_to(np.arange(len(neighbors))[:, None], neighbors.shape)
+        np.add.at(votes, (rows[valid], labels[valid]), 1)
+        return self.classes_[votes.argmax(axis=1)]
+
+    def __build(self, X: np.ndarray) -> Tuple[Optional[PCA], Any]:
+        pca: Optional[PCA] = None
+        # O PCA não extrai mais componentes que o menor lado da matriz
+        n_components = min(self.n_components, min(X.shape)) if self.n_components is not None else None
+        if n_components is not None and n_components < X.shape[1]:
+            pca = PCA(n_components=n_components, random_state=42).fit(X)
+            X = np.ascontiguousarray(pca.transform(X), dtype='float32')
+
+        dimension = X.shape[1]
+        if self.index_type == 'flat':
+            index = faiss.IndexFlatL2(dimension)
+        elif self.index_type == 'ivf':
+            # O FAISS recomenda ao menos 39 pontos de treino por lista
+            nlist = self.nlist or max(1, min(int(4 * np.sqrt(len(X))), len(X) // 39))
+            nlist = min(nlist, len(X))
+            quantizer = faiss.IndexFlatL2(dimension)
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+            index.train(X)
+        elif self.index_type == 'hnsw':
+            index = faiss.IndexHNSWFlat(dimension, self.hnsw_m)
+        else:
+            raise ValueError(f"Tipo de índice desconhecido: {self.index_type}")
+        index.add(X)
+        return pca, index
+
+    def __project(self, X: np.ndarray) -> np.ndarray:
+        if self.pca_ is None:
+            return X
+        return np.ascontiguousarray(self.pca_.transform(X), dtype='float32')
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Índices FAISS não são serializáveis com pickle; são gravados como bytes
+        state = self.__dict__.copy()
+        if 'index_' in state:
+            state['index_'] = faiss.serialize_index(state['index_'])
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        if 'index_' in state:
+            state['index_'] = faiss.deserialize_index(state['index_'])
+        self.__dict__.update(state)
+
+
+def benchmark_against_exact(model: FaissKNeighborsClassifier, X_train: pd.DataFrame, y_train: pd.Series,
+                            X_test: pd.DataFrame, y_test: pd.Series, max_rows: int = 5_000) -> Dict[str, Any]:
+    """
+    Compara o KNN aproximado com o KNN exato do scikit-learn sobre as features originais.
+
+    Para manter o custo do KNN exato limitado, a comparação usa no máximo `max_rows` linhas de teste.
+
+    Returns:
+        Dict[str, Any]: Acurácias, concordância entre as predições e tempos de predição.
+    """
+    if len(X_test) > max_rows:
+        X_test = X_test.sample(max_rows, random_state=42)
+        y_test = y_test.loc[X_test.index]
+
+    start = time.monotonic()
+    ann_predictions = model.predict(X_test)
+    ann_seconds = time.monotonic() - start
+
+    exact = KNeighborsClassifier(n_neighbors=model.n_neighbors, algorithm='brute').fit(X_train, y_train)
+    start = time.monotonic()
+    exact_predictions = exact.predict(X_test)
+    exact_seconds = time.monotonic() - start
+
+    return {
+        'rows': int(len(X_test)),
+        'index_type': model.index_type,
+        'n_components': model.n_components,
+        'ann_accuracy': float(accuracy_score(y_test, ann_predictions)),
+        'exact_accuracy': float(accuracy_score(y_test, exact_predictions)),
+        'agreement': float(np.mean(ann_predictions == exact_predictions)),
+        'ann_predict_seconds': round(ann_seconds, 4),
+        'exact_predict_seconds': round(exact_seconds, 4),
+    }
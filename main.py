@@ -7,6 +7,10 @@ from models import TBPrimaryActions
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from report import ReportsDashboard
+from scoring import ScoringDashboard
+from sampling import SessionSampling, describe_with_confidence
+from memory import MB, frame_token, load_frame, session_usage, store_frame, store_shared_frame
+from versioning import DatasetLineage
 engine = create_engine('sqlite:///actions.db')
 Session = sessionmaker(bind=engine)
 session = Session()
@@ -16,14 +20,15 @@ class Dashboard:
     """
 
     def __init__(self) -> None:
-        self.data: pd.DataFrame = st.session_state.get('data', None)
-        self.processed_data: pd.DataFrame = st.session_state.get('processed_data', None)
+        self.sampling: SessionSampling = SessionSampling(load_frame('data'))
+        self.data: pd.DataFrame = self.sampling.data()
+        self.processed_data: pd.DataFrame = load_frame('processed_data')
         self.dataset_name: str = st.session_state.get('dataset_name', 'Desconhecido')
 
         from preprocessing import Preprocessing 
         self.preprocessor: Preprocessing = Preprocessing(self.data)
         from description import Description 
-        self.description: Description = Description(self.data)
+        self.description: Description = Description(self.data, self.sampling.info())
         from aiprocessing import AiProcessing 
         self.aiprocessing: AiProcessing = AiProcessing(self.data,self.processed_data)
         if 'action_saved' not in st.session_state:
@@ -35,10 +40,14 @@ class Dashboard:
         st.sidebar.title("CooperGest")
         selected_option: str = st.sidebar.radio(
             "Selecione uma opção",
-            ["Pré-processamento", "Análise sem pré-processamento", "Descrição", "Processamento com IA", "Upload de arquivo", "Mesclar Bases", "Relatórios"]
+            ["Pré-processamento", "Análise sem pré-processamento", "Descrição", "Processamento com IA", "Upload de arquivo", "Mesclar Bases", "Relatórios", "Pontuação em lote"]
         )
         if self.data is not None:
             st.sidebar.write(f"Base de dados carregada:", self.dataset_name)
+            self.sampling.render_sidebar()
+            usage = session_usage()
+            st.sidebar.caption(f"Memória da sessão: {usage['resident_bytes'] / MB:.0f} MB em uso, "
+                               f"{usage['spilled_bytes'] / MB:.0f} MB em disco")
         else:
             st.sidebar.write(f"Nenhuma base de dados carregada")
         options: dict[str, callable] = {
@@ -48,7 +57,8 @@ class Dashboard:
             "Processamento com IA": self.__process_with_ai,
             "Upload de arquivo": self.__upload_file,
             "Mesclar Bases": self.__merge_spreadsheets,
-            "Relatórios": ReportsDashboard().run
+            "Relatórios": ReportsDashboard().run,
+            "Pontuação em lote": ScoringDashboard().run
             
         }
         
@@ -77,7 +87,8 @@ class Dashboard:
             new_action = TBPrimaryActions(
                 action_name=action_name,
                 dataset_name=dataset_name,
-                is_ai=is_ai
+                is_ai=is_ai,
+                dataset_version=st.session_state.get('dataset_version')
             )
             session.add(new_action)
             session.commit()
@@ -89,12 +100,12 @@ class Dashboard:
         """
         Get the data for AI processing.
         """
-        if 'processed_data' in st.session_state and st.session_state['processed_data'] is not None:
-            return st.session_state['processed_data'], st.session_state.get('method', None)
+        if self.processed_data is not None:
+            return self.processed_data, st.session_state.get('method', None)
 
         processed_data, method = self.aiprocessing.run()
 
-        st.session_state['processed_data'] = processed_data
+        store_frame('processed_data', processed_data)
         st.session_state['method'] = method
 
         return processed_data, method
@@ -106,31 +117,49 @@ class Dashboard:
         file: Optional[st.uploaded_file_manager.UploadedFile] = st.file_uploader("Upload arquivo CSV", type="csv")
         if file is not None:
             try:
-                self.data = pd.read_csv(file)
-                st.session_state.data = self.data  
+                # Uploads com o mesmo conteúdo em sessões diferentes compartilham um único DataFrame
+                self.data = store_shared_frame('data', file.getvalue(), lambda: pd.read_csv(file))
                 st.session_state['dataset_name'] = file.name  
+                self.__register_version(file.name)
                 st.write("Arquivo CSV carregado com sucesso!")
                 st.write(self.data.head())
             except Exception as e:
                 st.error(f"Erro ao carregar o arquivo: {e}")
+
+    def __register_version(self, dataset_name: str) -> None:
+        """
+        Register the uploaded content as a version of the dataset and show what changed.
+        """
+        # O arquivo continua no uploader a cada rerun; só registra quando o conteúdo muda
+        token = frame_token('data')
+        if st.session_state.get('dataset_version_token') != token:
+            version = DatasetLineage(dataset_name).register(self.data)
+            st.session_state['dataset_version'] = version.version
+            st.session_state['dataset_key_column'] = version.key_column
+            st.session_state['dataset_version_summary'] = (
+                f"Versão {version.version} de {dataset_name}: {version.added_rows} linhas novas, "
+                f"{version.removed_rows} removidas e {version.changed_rows} alteradas"
+            )
+            st.session_state['dataset_version_token'] = token
+        st.info(st.session_state['dataset_version_summary'])
     @staticmethod
-    @st.cache_data
-    def convert_df(_df: pd.DataFrame) -> bytes:
-        return _df.to_csv(index=False).encode('utf-8')
+    def convert_df(df: pd.DataFrame) -> bytes:
+        return df.to_csv(index=False).encode('utf-8')
     
     def download_spreadsheet(self, df: pd.DataFrame, filename: str) -> None:
         """
         Download a spreadsheet.
+        The CSV is only encoded when requested, so its bytes are not kept in memory outside the governor between interactions.
         """
         try:
-            
-            csv: bytes = self.convert_df(df)
-            st.download_button(
-                label="Baixar Base",
-                data=csv,
-                file_name=filename,
-                mime="text/csv"
-            )
+            if st.button("Gerar arquivo para download", key=f"prepare_{filename}"):
+                csv: bytes = self.convert_df(df)
+                st.download_button(
+                    label="Baixar Base",
+                    data=csv,
+                    file_name=filename,
+                    mime="text/csv"
+                )
         except Exception as e:
             st.error(f"Erro ao baixar a Base: {e}")
 
@@ -183,9 +212,15 @@ class Dashboard:
         numeric_columns: pd.Index = not_cleaned_data.select_dtypes(include=np.number).columns
         selected_numeric_columns: List[str] = [col for col in numeric_columns if col in columns]
         non_numeric_columns: List[str] = [col for col in columns if col not in selected_numeric_columns]
+        sample_info = self.sampling.info()
+        if sample_info is not None and columns:
+            st.caption(f"Resultados sobre uma amostra de {sample_info['fraction']:.1%} da base")
         if selected_numeric_columns:
             for col in selected_numeric_columns:
                 st.write(not_cleaned_data[col].describe())
+            if sample_info is not None:
+                st.write("Intervalos de confiança (95%) das médias:")
+                st.write(describe_with_confidence(not_cleaned_data[selected_numeric_columns], sample_info['total_rows']))
         if non_numeric_columns:
             for col in non_numeric_columns:
                 fig_width: float = 20 / len(columns)
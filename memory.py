@@ -0,0 +1,306 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+import streamlit as st
+
+MB = 1024 * 1024
+# Orçamentos de memória, configuráveis por variáveis de ambiente (em MB)
+GLOBAL_BUDGET_BYTES = int(os.environ.get('COOPERGEST_MEMORY_BUDGET_MB', '4096')) * MB
+SESSION_BUDGET_BYTES = int(os.environ.get('COOPERGEST_SESSION_MEMORY_BUDGET_MB', '1024')) * MB
+# Diretório onde os DataFrames despejados da memória são gravados em Parquet
+SPILL_DIR = 'spill'
+# Sessões sem acesso por mais tempo que isso têm seus dados descartados
+SESSION_IDLE_SECONDS = 4 * 60 * 60
+
+
+class _Block:
+    """
+    Um DataFrame controlado pelo governador, residente em memória ou despejado em disco.
+    """
+
+    def __init__(self, block_id: str, frame: pd.DataFrame, shared: bool) -> None:
+        self.block_id: str = block_id
+        self.frame: Optional[pd.DataFrame] = frame
+        self.nbytes: int = int(frame.memory_usage(deep=True).sum())
+        self.shared: bool = shared
+        self.owners: Set[str] = set()
+        self.last_access: float = time.monotonic()
+        self.spill_path: Optional[str] = None
+        # Indica que o DataFrame está sendo gravado em disco fora da trava
+        self.spilling: bool = False
+
+
+class MemoryGovernor:
+    """
+    Controla os DataFrames grandes de todas as sessões do servidor.
+
+    Cada sessão referencia seus DataFrames por chave. Quando o orçamento global ou o da sessão
+    é excedido, os DataFrames usados há mais tempo são gravados em Parquet e liberados da memória;
+    eles são recarregados sob demanda no próximo acesso. Uploads idênticos em sessões diferentes
+    apontam para um único DataFrame compartilhado, que deve ser tratado como somente leitura.
+
+    A leitura do CSV enviado e a gravação e releitura dos arquivos de despejo acontecem fora da
+    trava, para que a entrada e saída de uma sessão não bloqueie o acesso das demais.
+    """
+
+    def __init__(self, global_budget: int = GLOBAL_BUDGET_BYTES, session_budget: int = SESSION_BUDGET_BYTES,
+                 spill_dir: str = SPILL_DIR) -> None:
+        self.global_budget: int = global_budget
+        self.session_budget: int = session_budget
+        self.spill_dir: str = spill_dir
+        self.__lock = threading.RLock()
+        self.__blocks: Dict[str, _Block] = {}
+        self.__sessions: Dict[str, Dict[str, str]] = {}
+        self.__last_seen: Dict[str, float] = {}
+        # Arquivos de despejo de execuções anteriores não pertencem a nenhum bloco e nunca seriam removidos
+        self.__remove_leftover_spills()
+
+    def put(self, session_id: str, key: str, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Registra um DataFrame da sessão, substituindo o anterior com a mesma chave.
+        """
+        block = _Block(uuid.uuid4().hex, frame, shared=False)
+        with self.__lock:
+            self.__attach(session_id, key, block)
+            victims = self.__enforce(protect=block)
+        self.__spill(victims)
+        return frame
+
+    def put_shared(self, session_id: str, key: str, digest: str, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Registra um DataFrame identificado pelo hash do conteúdo de origem. Se outra sessão já carregou
+        o mesmo conteúdo, reutiliza a cópia existente sem chamar `loader`.
+        """
+        block_id = f"shared-{digest}"
+        with self.__lock:
+            block = self.__blocks.get(block_id)
+            if block is not None:
+                self.__attach(session_id, key, block)
+        if block is None:
+            frame = loader()
+            with self.__lock:
+                # Outra sessão pode ter carregado o mesmo conteúdo enquanto este era lido
+                block = self.__blocks.get(block_id) or _Block(block_id, frame, shared=True)
+                self.__attach(session_id, key, block)
+        return self.__access(block)
+
+    def get(self, session_id: str, key: str) -> Optional[pd.DataFrame]:
+        """
+        Retorna o DataFrame da sessão, recarregando-o do disco se tiver sido despejado.
+        """
+        with self.__lock:
+            self.__last_seen[session_id] = time.monotonic()
+            block_id = self.__sessions.get(session_id, {}).get(key)
+            if block_id is None:
+                return None
+            block = self.__blocks[block_id]
+        return self.__access(block)
+
+    def token(self, session_id: str, key: str) -> Optional[str]:
+        """
+        Identificador estável do DataFrame associado à chave, que muda apenas quando ele é substituído.
+        """
+        with self.__lock:
+            return self.__sessions.get(session_id, {}).get(key)
+
+    def release(self, session_id: str, key: str) -> None:
+        with self.__lock:
+            block_id = self.__sessions.get(session_id, {}).pop(key, None)
+            if block_id is not None:
+                self.__detach(session_id, block_id)
+
+    def usage(self, session_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Bytes residentes em memória e despejados em disco, no servidor ou em uma sessão.
+        """
+        with self.__lock:
+            blocks = self.__blocks.values()
+            if session_id is not None:
+                blocks = [block for block in blocks if session_id in block.owners]
+            return {
+                'resident_bytes': sum(block.nbytes for block in blocks if block.frame is not None),
+                'spilled_bytes': sum(block.nbytes for block in blocks if block.frame is None),
+            }
+
+    def __attach(self, session_id: str, key: str, block: _Block) -> None:
+        self.__purge_idle_sessions()
+        self.__last_seen[session_id] = time.monotonic()
+        keys = self.__sessions.setdefault(session_id, {})
+        previous = keys.get(key)
+        if previous == block.block_id:
+            return
+        keys[key] = block.block_id
+        block.owners.add(session_id)
+        self.__blocks[block.block_id] = block
+        if previous is not None:
+            self.__detach(session_id, previous)
+
+    def __detach(self, session_id: str, block_id: str) -> None:
+        block = self.__blocks.get(block_id)
+        if block is None:
+            return
+        # Um DataFrame compartilhado pode estar sob mais de uma chave da mesma sessão
+        if session_id not in self.__sessions or block_id not in self.__sessions[session_id].values():
+            block.owners.discard(session_id)
+        if not block.owners:
+            del self.__blocks[block_id]
+            self.__remove_spill(block)
+
+    def __access(self, block: _Block) -> pd.DataFrame:
+        """
+        Retorna o DataFrame do bloco, relendo o arquivo de despejo fora da trava se necessário,
+        e aplica os orçamentos.
+        """
+        with self.__lock:
+            block.last_access = time.monotonic()
+            frame, path = block.frame, block.spill_path
+        if frame is None:
+            frame = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_pickle(path)
+            with self.__lock:
+                if block.frame is None:
+                    block.frame = frame
+                frame = block.frame
+                block.last_access = time.monotonic()
+        with self.__lock:
+            victims = self.__enforce(protect=block)
+        self.__spill(victims)
+        return frame
+
+    def __spill(self, victims: List[Tuple[_Block, pd.DataFrame, float]]) -> None:
+        """
+        Grava os blocos escolhidos por `__enforce` fora da trava e libera a memória dos que
+        não foram acessados nem removidos durante a gravação.
+        """
+        for block, frame, selected_at in victims:
+            path = block.spill_path or self.__write(block.block_id, frame)
+            with self.__lock:
+                block.spilling = False
+                if self.__blocks.get(block.block_id) is not block:
+                    # O bloco foi descartado durante a gravação
+                    if block.spill_path is None and os.path.exists(path):
+                        os.remove(path)
+                    continue
+                block.spill_path = path
+                if block.last_access <= selected_at:
+                    block.frame = None
+
+    def __write(self, block_id: str, frame: pd.DataFrame) -> str:
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"{block_id}.parquet")
+        try:
+            frame.to_parquet(path)
+        except Exception:
+            # Colunas com tipos mistos não são aceitas pelo Parquet; nesse caso o pickle preserva os dados
+            if os.path.exists(path):
+                os.remove(path)
+            path = os.path.join(self.spill_dir, f"{block_id}.pkl")
+            frame.to_pickle(path)
+        return path
+
+    def __enforce(self, protect: Optional[_Block] = None) -> List[Tuple[_Block, pd.DataFrame, float]]:
+        """
+        Escolhe os DataFrames menos usados recentemente a despejar em disco até respeitar os orçamentos.
+        O DataFrame que acabou de ser acessado nunca é despejado. A gravação é feita depois, fora da trava.
+        """
+        now = time.monotonic()
+        resident = sorted((block for block in self.__blocks.values()
+                           if block.frame is not None and not block.spilling and block is not protect),
+                          key=lambda block: block.last_access)
+        victims: List[Tuple[_Block, pd.DataFrame, float]] = []
+
+        def choose(block: _Block) -> None:
+            block.spilling = True
+            victims.append((block, block.frame, now))
+
+        for session_id in list(self.__sessions):
+            # Dados compartilhados contam apenas para o orçamento global
+            session_blocks = [block for block in resident if not block.shared and session_id in block.owners]
+            session_bytes = sum(block.nbytes for block in self.__blocks.values()
+                                if block.frame is not None and not block.spilling
+                                and not block.shared and session_id in block.owners)
+            for block in session_blocks:
+                if session_bytes <= self.session_budget:
+                    break
+                if not block.spilling:
+                    choose(block)
+                    session_bytes -= block.nbytes
+
+        total_bytes = sum(block.nbytes for block in self.__blocks.values()
+                          if block.frame is not None and not block.spilling)
+        for block in resident:
+            if total_bytes <= self.global_budget:
+                break
+            if not block.spilling:
+                choose(block)
+                total_bytes -= block.nbytes
+        return victims
+
+    def __purge_idle_sessions(self) -> None:
+        now = time.monotonic()
+        for session_id, last_seen in list(self.__last_seen.items()):
+            if now - last_seen > SESSION_IDLE_SECONDS:
+                for key in list(self.__sessions.get(session_id, {})):
+                    self.release(session_id, key)
+                self.__sessions.pop(session_id, None)
+                del self.__last_seen[session_id]
+
+    @staticmethod
+    def __remove_spill(block: _Block) -> None:
+        if block.spill_path is not None and os.path.exists(block.spill_path):
+            os.remove(block.spill_path)
+
+    def __remove_leftover_spills(self) -> None:
+        if not os.path.isdir(self.spill_dir):
+            return
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(('.parquet', '.pkl')):
+                os.remove(os.path.join(self.spill_dir, name))
+
+
+# Governador único do processo, compartilhado por todas as sessões do Streamlit
+governor = MemoryGovernor()
+
+
+def session_id() -> str:
+    if 'memory_session_id' not in st.session_state:
+        st.session_state['memory_session_id'] = uuid.uuid4().hex
+    return st.session_state['memory_session_id']
+
+
+def store_frame(key: str, frame: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Guarda um DataFrame da sessão sob o controle do governador. None remove a chave.
+    """
+    if frame is None:
+        governor.release(session_id(), key)
+        return None
+    return governor.put(session_id(), key, frame)
+
+
+def store_shared_frame(key: str, content: bytes, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Guarda um DataFrame carregado de `content`, compartilhando-o com sessões que enviaram o mesmo conteúdo.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    return governor.put_shared(session_id(), key, digest, loader)
+
+
+def load_frame(key: str) -> Optional[pd.DataFrame]:
+    return governor.get(session_id(), key)
+
+
+def frame_token(key: str) -> Optional[str]:
+    return governor.token(session_id(), key)
+
+
+def release_frame(key: str) -> None:
+    governor.release(session_id(), key)
+
+
+def session_usage() -> Dict[str, int]:
+    return governor.usage(session_id())
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, DateTime, JSON
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, Boolean, ForeignKey, DateTime, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from datetime import datetime
@@ -16,6 +16,7 @@ class TBPrimaryActions(Base):
     action_name = Column(String, nullable=False)  # Nome da ação principal
     dataset_name = Column(String, nullable=True)  # Nome do dataset utilizado
     is_ai = Column(Boolean, default=False)  # Indica se a ação envolve IA
+    dataset_version = Column(Integer, nullable=True)  # Versão do dataset utilizada (ver TBDatasetVersions)
     timestamp = Column(DateTime, default=datetime.utcnow)  # Momento da ação
     ai_actions = relationship("TBAiActions", back_populates="primary_action", cascade="all, delete-orphan")  # Relação 1:N com AiActions
 
@@ -29,5 +30,23 @@ class TBAiActions(Base):
     primary_action_id = Column(Integer, ForeignKey('tb_primary_actions.id'), nullable=False)  # Chave estrangeira para PrimaryActions
     primary_action = relationship("TBPrimaryActions", back_populates="ai_actions")  # Relação N:1 com PrimaryActions
 
+class TBDatasetVersions(Base):
+    __tablename__ = 'tb_dataset_versions'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    dataset_name = Column(String, nullable=False)  # Nome do dataset
+    version = Column(Integer, nullable=False)  # Número sequencial da versão dentro do dataset
+    content_hash = Column(String, nullable=False)  # Hash do conteúdo, usado para reconhecer reenvios do mesmo arquivo
+    key_column = Column(String, nullable=True)  # Coluna usada para identificar linhas alteradas
+    total_rows = Column(Integer, nullable=False)  # Total de linhas da versão
+    added_rows = Column(Integer, nullable=False)  # Linhas novas em relação à versão anterior
+    removed_rows = Column(Integer, nullable=False)  # Linhas removidas em relação à versão anterior
+    changed_rows = Column(Integer, nullable=False)  # Linhas alteradas em relação à versão anterior
+    timestamp = Column(DateTime, default=datetime.utcnow)  # Momento do upload
+
 
 Base.metadata.create_all(engine)
+
+# Bancos criados antes da coluna de versão não são alterados pelo create_all
+if 'dataset_version' not in [column['name'] for column in inspect(engine).get_columns('tb_primary_actions')]:
+    with engine.begin() as connection:
+        connection.execute(text('ALTER TABLE tb_primary_actions ADD COLUMN dataset_version INTEGER'))
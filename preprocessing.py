@@ -1,12 +1,16 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import pandas as pd
 import numpy as np
 import streamlit as st
+from sklearn.base import clone
 from sklearn.preprocessing import (
     MinMaxScaler, StandardScaler, RobustScaler, Normalizer, MaxAbsScaler, OneHotEncoder
 )
 from scipy import stats
 from main import Dashboard
+from memory import frame_token
+from versioning import IncrementalPreprocessing
+from dedup import EXACT, NEAR, DuplicateDetector
 
 
 class Preprocessing:
@@ -14,6 +18,13 @@ class Preprocessing:
         self.data: pd.DataFrame = data
         self.scaler: Optional[str] = None
         self.cleaning_methods: Optional[List[str]] = None
+        self.fitted_scalers: Dict[str, Any] = {}
+        self.encoder: Optional[OneHotEncoder] = None
+        self.numerical_columns: List[str] = []
+        self.categorical_columns: List[str] = []
+        self.duplicate_columns: Optional[List[str]] = None
+        self.duplicate_mode: str = EXACT
+        self.similarity_threshold: float = 0.9
 
     def run(self) -> Optional[pd.DataFrame]:
         """
@@ -24,6 +35,7 @@ class Preprocessing:
         """
         self.select_preprocessing_method()
         self.select_cleaning_method()
+        self.select_duplicate_method()
         if st.sidebar.button('Aplicar'):
             new_data = self.__apply_preprocessing()
             show = st.sidebar.checkbox('Mostrar dados após pré-processamento', value=True)
@@ -43,6 +55,21 @@ class Preprocessing:
         )
         self.cleaning_methods = cleaning_method
 
+    def select_duplicate_method(self) -> None:
+        """
+        Exibe no sidebar as opções de remoção de duplicadas: colunas comparadas e modo exato ou aproximado.
+        """
+        if 'Remover linhas duplicadas' not in self.cleaning_methods:
+            return
+        columns = self.data.columns.tolist()
+        selected_columns = st.sidebar.multiselect('Colunas comparadas na busca de duplicadas:', columns, default=columns)
+        self.duplicate_columns = selected_columns if selected_columns and selected_columns != columns else None
+        self.duplicate_mode = st.sidebar.radio('Tipo de duplicada:', (EXACT, NEAR), index=0)
+        if self.duplicate_mode == NEAR:
+            self.similarity_threshold = st.sidebar.slider(
+                'Fração mínima de colunas iguais:', min_value=0.5, max_value=1.0, value=0.9, step=0.05
+            )
+
     def select_preprocessing_method(self) -> None:
         """
         Exibe uma caixa de seleção no sidebar para selecionar método de normalização.
@@ -70,6 +97,8 @@ class Preprocessing:
         }
 
         scaler = scaler_map.get(self.scaler)
+        if self.__incremental_available():
+            return self.__apply_incremental_preprocessing(scaler)
         df = self.data.copy()
 
         # Aplicar limpeza
@@ -89,8 +118,10 @@ class Preprocessing:
         if self.scaler != 'nenhum' and scaler:
             if not numerical_df.empty:
                 for col in numerical_df.columns:
-                    scaled_data = scaler.fit_transform(numerical_df[[col]])
+                    column_scaler = clone(scaler)
+                    scaled_data = column_scaler.fit_transform(numerical_df[[col]])
                     numerical_df[col] = scaled_data
+                    self.fitted_scalers[col] = column_scaler
                     st.write(f"{col} normalizado pelo método {self.scaler}:")
                     st.write(numerical_df[[col]])
             else:
@@ -118,10 +149,15 @@ class Preprocessing:
             pd.DataFrame: DataFrame após pré-processamento e concatenação.
         """
         categorical_df = df.select_dtypes(include=['object'])
+        self.numerical_columns = numerical_df.columns.tolist()
+        self.categorical_columns = categorical_df.columns.tolist()
 
         if not categorical_df.empty:
-            enc = OneHotEncoder(sparse_output=False)  # `sparse_output=False` para retornar um DataFrame
-            encoded_data = pd.DataFrame(enc.fit_transform(categorical_df), columns=enc.get_feature_names_out(categorical_df.columns))
+            # `handle_unknown='ignore'` permite reaplicar o encoder em dados novos com categorias inéditas
+            enc = OneHotEncoder(sparse_output=False, handle_unknown='ignore')  # `sparse_output=False` para retornar um DataFrame
+            self.encoder = enc
+            encoded_data = pd.DataFrame(enc.fit_transform(categorical_df), columns=enc.get_feature_names_out(categorical_df.columns),
+                                        index=categorical_df.index)
 
 
             final_df = pd.concat([numerical_df, encoded_data], axis=1)
@@ -130,6 +166,64 @@ class Preprocessing:
 
         return final_df
 
+    def __incremental_available(self) -> bool:
+        """
+        Verifica se os dados são uma versão registrada do dataset, sem amostragem, e se os métodos
+        de limpeza permitem reprocessar apenas as linhas alteradas.
+        """
+        return (
+            st.session_state.get('dataset_version') is not None
+            and st.session_state.get('dataset_version_token') == frame_token('data')
+            and not st.session_state.get('sampling_enabled', False)
+            and IncrementalPreprocessing.supports(self.cleaning_methods)
+            # O cache incremental compara linhas inteiras; duplicadas por subconjunto ou aproximadas exigem a base toda
+            and (self.duplicate_columns is None and self.duplicate_mode == EXACT
+                 or 'Remover linhas duplicadas' not in self.cleaning_methods)
+        )
+
+    def __apply_incremental_preprocessing(self, scaler: Optional[Any]) -> pd.DataFrame:
+        """
+        Aplica o pré-processamento reaproveitando o resultado da versão anterior do dataset,
+        reprocessando apenas as linhas novas ou alteradas.
+
+        Args:
+            scaler (Optional[Any]): Scaler selecionado, ou None se nenhum foi selecionado.
+
+        Returns:
+            pd.DataFrame: DataFrame após aplicação dos métodos.
+        """
+        incremental = IncrementalPreprocessing(
+            st.session_state['dataset_name'], st.session_state.get('dataset_key_column'),
+            self.scaler, self.cleaning_methods
+        )
+        final_df, state, info = incremental.run(self.data, st.session_state['dataset_version'], scaler)
+        self.numerical_columns = state['numerical_columns']
+        self.categorical_columns = state['categorical_columns']
+        self.fitted_scalers = state['scalers']
+        self.encoder = state['encoder']
+
+        st.write(f"Versão {st.session_state['dataset_version']} do dataset: "
+                 f"{info['reprocessed_rows']} de {info['total_rows']} linhas reprocessadas.")
+        st.write("Dados após pré-processamento:")
+        st.write(final_df)
+
+        return final_df
+
+    def fitted_state(self) -> Dict[str, Any]:
+        """
+        Retorna o estado ajustado do pré-processamento (scalers, encoder e colunas),
+        necessário para reaplicar as mesmas transformações em dados novos.
+
+        Returns:
+            Dict[str, Any]: Estado ajustado do pré-processamento.
+        """
+        return {
+            'numerical_columns': self.numerical_columns,
+            'categorical_columns': self.categorical_columns,
+            'scalers': self.fitted_scalers,
+            'encoder': self.encoder,
+        }
+
     def __show(self, new_data: pd.DataFrame) -> None:
         """
         Exibe o DataFrame antes e depois da aplicação dos métodos de limpeza e normalização.
@@ -158,7 +252,7 @@ class Preprocessing:
 
     def __clean_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Remove linhas duplicadas do DataFrame.
+        Remove linhas duplicadas do DataFrame, exatas ou aproximadas, considerando as colunas selecionadas.
 
         Args:
             df (pd.DataFrame): DataFrame a ser limpo.
@@ -166,8 +260,13 @@ class Preprocessing:
         Returns:
             pd.DataFrame: DataFrame sem linhas duplicadas.
         """
-        st.write('Valores duplicados antes da limpeza:', df.duplicated().sum())
-        return df.drop_duplicates()
+        detector = DuplicateDetector(self.duplicate_columns, self.duplicate_mode, self.similarity_threshold).fit(df)
+        st.write('Valores duplicados antes da limpeza:', int(detector.duplicated_.sum()))
+        clusters = detector.clusters()
+        if not clusters.empty:
+            st.write('Grupos de linhas duplicadas (cada linha removida atinge o limiar contra uma linha mantida):')
+            st.dataframe(clusters)
+        return detector.drop(df)
 
     def __clean_noise(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -187,5 +286,5 @@ class Preprocessing:
         st.write('Valores ruidosos antes da limpeza:', (np.abs(stats.zscore(numerical_df)) > 3).sum())
         cleaned_df = numerical_df[(np.abs(stats.zscore(numerical_df)) < 3).all(axis=1)]
 
-        cleaned_df = pd.concat([cleaned_df, categorical_values], axis=1)
+        cleaned_df = pd.concat([cleaned_df, categorical_values.loc[cleaned_df.index]], axis=1)
         return cleaned_df
@@ -1,9 +1,9 @@
 import streamlit as st
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine, func
-from models import TBAiActions, TBPrimaryActions
+from models import TBAiActions, TBDatasetVersions, TBPrimaryActions
 import pandas as pd
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 # Configuração do banco de dados
 engine = create_engine('sqlite:///actions.db')
@@ -16,14 +16,14 @@ class ReportsDashboard:
     """
 
     @staticmethod
-    def __get_report_data() -> Tuple[int, int, List[Tuple[str, int]]]:
+    def __get_report_data() -> Tuple[int, int, List[Tuple[str, Optional[int], int]]]:
         """
         Obtém dados do relatório do banco de dados.
 
         Returns:
             total_preprocessing (int): Total de pré-processamentos.
             total_ai_processing (int): Total de processamentos com IA.
-            preprocessing_details (List[Tuple[str, int]]): Detalhes dos pré-processamentos.
+            preprocessing_details (List[Tuple[str, Optional[int], int]]): Detalhes dos pré-processamentos por dataset e versão.
         """
         try:
             total_preprocessing = session.query(func.count(TBPrimaryActions.id)).filter(TBPrimaryActions.is_ai == False).scalar()
@@ -34,9 +34,11 @@ class ReportsDashboard:
                 .scalar()
             )
 
-            preprocessing_details = session.query(TBPrimaryActions.dataset_name, func.count(TBPrimaryActions.id))\
+            preprocessing_details = session.query(TBPrimaryActions.dataset_name, TBPrimaryActions.dataset_version,
+                                                  func.count(TBPrimaryActions.id))\
                                            .filter(TBPrimaryActions.is_ai == False)\
-                                           .group_by(TBPrimaryActions.dataset_name).all()
+                                           .group_by(TBPrimaryActions.dataset_name, TBPrimaryActions.dataset_version)\
+                                           .order_by(TBPrimaryActions.dataset_name, TBPrimaryActions.dataset_version).all()
 
             return total_preprocessing, total_ai_processing, preprocessing_details
         except Exception as e:
@@ -61,6 +63,25 @@ class ReportsDashboard:
         except Exception as e:
             st.error(f"Ocorreu um erro ao obter as ações de IA para o dataset '{dataset_name}': {e}")
             return []
+
+    @staticmethod
+    def __get_versions_by_dataset(dataset_name: str) -> List[TBDatasetVersions]:
+        """
+        Obtém as versões registradas de um dataset específico.
+
+        Args:
+            dataset_name (str): Nome do dataset.
+
+        Returns:
+            List[TBDatasetVersions]: Lista de versões do dataset, da mais antiga para a mais recente.
+        """
+        try:
+            return session.query(TBDatasetVersions)\
+                          .filter(TBDatasetVersions.dataset_name == dataset_name)\
+                          .order_by(TBDatasetVersions.version).all()
+        except Exception as e:
+            st.error(f"Ocorreu um erro ao obter as versões do dataset '{dataset_name}': {e}")
+            return []
     def __select_dataset(self, dataset_options: List[str]) -> str:
         selected_dataset = st.selectbox('Escolha o dataset', dataset_options)
         return selected_dataset
@@ -78,17 +99,32 @@ class ReportsDashboard:
 
             st.subheader('Detalhes dos Pré-processamentos')
             if preprocessing_details:
-                df = pd.DataFrame(preprocessing_details, columns=['Dataset', 'Quantidade'])
+                df = pd.DataFrame(preprocessing_details, columns=['Dataset', 'Versão', 'Quantidade'])
                 st.dataframe(df)
 
-                dataset_options = [detail[0] for detail in preprocessing_details]
+                dataset_options = list(dict.fromkeys(detail[0] for detail in preprocessing_details))
                 selected_dataset = self.__select_dataset(dataset_options)
 
                 if selected_dataset:
+                    versions = self.__get_versions_by_dataset(selected_dataset)
+                    if versions:
+                        df_versions = pd.DataFrame([{
+                            'Versão': version.version,
+                            'Data': version.timestamp,
+                            'Linhas': version.total_rows,
+                            'Novas': version.added_rows,
+                            'Removidas': version.removed_rows,
+                            'Alteradas': version.changed_rows,
+                            'Coluna Chave': version.key_column
+                        } for version in versions])
+                        st.subheader('Versões do Dataset')
+                        st.dataframe(df_versions)
+
                     ai_actions = self.__get_ai_actions_by_dataset(selected_dataset)
 
                     if ai_actions:
                         ai_actions_data = [{
+                            'Versão': action.primary_action.dataset_version,
                             'Paradigma': action.paradigm,
                             'Modelo': action.model,
                             'Coluna Alvo': action.target_column,
@@ -0,0 +1,290 @@
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from memory import frame_token, governor, load_frame, release_frame, session_id, store_frame
+
+# Frações da base usadas em cada nível de refinamento da amostra
+SAMPLE_FRACTIONS = (0.01, 0.05, 0.25)
+MIN_SAMPLE_ROWS = 10_000
+# Bases maiores que este limite começam com o modo de amostragem ativado
+AUTO_SAMPLING_ROWS = 500_000
+# Apenas colunas com até esta quantidade de valores distintos podem estratificar a amostra
+MAX_STRATA = 50
+Z_95 = 1.96
+
+# Executor compartilhado que calcula o próximo nível de amostra em segundo plano
+_executor = ThreadPoolExecutor(max_workers=2)
+
+
+def sample_levels(n_rows: int) -> List[int]:
+    """
+    Tamanhos de amostra de cada nível, do menor para o maior, todos menores que a base.
+    """
+    sizes = {min(n_rows, max(MIN_SAMPLE_ROWS, int(n_rows * fraction))) for fraction in SAMPLE_FRACTIONS}
+    return sorted(size for size in sizes if size < n_rows)
+
+
+def _build_sample(owner: str, key: str, data: pd.DataFrame, stratify_column: Optional[str], size: int,
+                  cancelled: threading.Event) -> int:
+    """
+    Calcula uma amostra e a entrega ao governador de memória da sessão `owner`.
+
+    O sorteio é determinístico, então o amostrador é recriado a cada nível em vez de manter
+    seus índices (da ordem de 16 bytes por linha da base) na sessão entre as interações.
+    Se o estado da amostragem for descartado enquanto a amostra é calculada, ela não fica no governador.
+    """
+    if cancelled.is_set():
+        return 0
+    sample = ProgressiveSampler(data, stratify_column).sample(data, size)
+    governor.put(owner, key, sample)
+    # Quem cancela sinaliza antes de liberar a chave, então uma das duas liberações sempre alcança o bloco
+    if cancelled.is_set():
+        governor.release(owner, key)
+        return 0
+    return len(sample)
+
+
+class ProgressiveSampler:
+    """
+    Gera amostras aninhadas de tamanho crescente de um DataFrame.
+
+    Cada linha recebe uma chave aleatória (como em um reservoir sample por prioridades) e a
+    amostra de tamanho k é formada pelas k menores chaves. No modo estratificado a seleção
+    é feita dentro de cada classe da coluna alvo, com cotas proporcionais ao tamanho de cada
+    classe arredondadas pelo método dos maiores restos, de modo que a amostra tem exatamente k
+    linhas. Se houver mais classes que linhas na amostra, a seleção volta a ser uniforme.
+    Assim cada nível contém o anterior e as estatísticas convergem sem saltos.
+    """
+
+    def __init__(self, data: pd.DataFrame, stratify_column: Optional[str] = None, random_state: int = 42) -> None:
+        # Apenas a ordem aleatória é guardada, para não manter uma referência à base completa
+        self.n_rows: int = len(data)
+        self.stratify_column: Optional[str] = stratify_column
+        keys = np.random.default_rng(random_state).random(len(data))
+        self.__order: np.ndarray = np.argsort(keys, kind='stable')
+        self.__stratum_rank: Optional[np.ndarray] = None
+        self.__stratum_code: Optional[np.ndarray] = None
+        self.__stratum_counts: Optional[np.ndarray] = None
+        if stratify_column is not None:
+            codes = pd.factorize(data[stratify_column].iloc[self.__order], use_na_sentinel=False)[0]
+            self.__stratum_code = codes.astype(np.int32)
+            self.__stratum_rank = pd.Series(codes).groupby(codes).cumcount().to_numpy(dtype=np.int32)
+            self.__stratum_counts = np.bincount(codes)
+
+    def levels(self) -> List[int]:
+        return sample_levels(self.n_rows)
+
+    def sample(self, data: pd.DataFrame, size: int) -> pd.DataFrame:
+        """
+        Retorna a amostra de tamanho aproximado `size` da base usada na construção,
+        preservando a ordem original das linhas.
+        """
+        if self.__stratum_rank is None or len(self.__stratum_counts) > size:
+            positions = self.__order[:size]
+        else:
+            quotas = self.__stratum_counts * (size / self.n_rows)
+            allocation = np.floor(quotas).astype(np.int64)
+            remaining = size - int(allocation.sum())
+            # Maiores restos: as classes com maior parte fracionária recebem as linhas que faltam
+            allocation[np.argsort(allocation - quotas, kind='stable')[:remaining]] += 1
+            selected = self.__stratum_rank < allocation[self.__stratum_code]
+            positions = self.__order[selected]
+        return data.iloc[np.sort(positions)]
+
+
+def describe_with_confidence(sample: pd.DataFrame, population_size: int) -> pd.DataFrame:
+    """
+    Estatísticas das colunas numéricas da amostra com intervalo de confiança de 95% para a média,
+    usando a correção para população finita.
+
+    Args:
+        sample (pd.DataFrame): Amostra dos dados.
+        population_size (int): Número de linhas da base completa.
+
+    Returns:
+        pd.DataFrame: Média, desvio padrão e limites do intervalo de confiança por coluna.
+    """
+    numerical_df = sample.select_dtypes(include=np.number)
+    count = numerical_df.count()
+    mean = numerical_df.mean()
+    std = numerical_df.std()
+    correction = np.sqrt(np.clip((population_size - count) / max(population_size - 1, 1), 0, 1))
+    margin = Z_95 * std / np.sqrt(count) * correction
+    return pd.DataFrame({
+        'amostra (n)': count,
+        'média': mean,
+        'desvio padrão': std,
+        'IC 95% inferior': mean - margin,
+        'IC 95% superior': mean + margin,
+    })
+
+
+class SessionSampling:
+    """
+    Modo de amostragem da sessão: escolhe a amostra ativa, refina em segundo plano
+    e exibe no sidebar a fração usada e a opção de executar com a base completa.
+    """
+
+    def __init__(self, full_data: Optional[pd.DataFrame]) -> None:
+        self.full_data: Optional[pd.DataFrame] = full_data
+        if full_data is not None and 'sampling_enabled' not in st.session_state:
+            st.session_state['sampling_enabled'] = len(full_data) > AUTO_SAMPLING_ROWS
+
+    @property
+    def enabled(self) -> bool:
+        return self.full_data is not None and bool(st.session_state.get('sampling_enabled', False))
+
+    def data(self) -> Optional[pd.DataFrame]:
+        """
+        Retorna a amostra ativa, ou a base completa se a amostragem estiver desativada.
+        """
+        if not self.enabled:
+            return self.full_data
+        state = self.__state()
+        sample = load_frame('data_sample')
+        if sample is None:
+            return self.full_data
+        self.__schedule_next(state)
+        return sample
+
+    def info(self) -> Optional[Dict[str, Any]]:
+        """
+        Tamanho da amostra ativa e da base completa, ou None se a base completa estiver em uso.
+        """
+        if not self.enabled:
+            return None
+        state = self.__state()
+        if state['current_rows'] is None:
+            return None
+        sample_rows = state['current_rows']
+        total_rows = len(self.full_data)
+        return {'sample_rows': sample_rows, 'total_rows': total_rows, 'fraction': sample_rows / total_rows}
+
+    def render_sidebar(self) -> None:
+        """
+        Exibe os controles do modo de amostragem no sidebar.
+        """
+        if self.full_data is None:
+            return
+        st.sidebar.checkbox('Modo de amostragem', key='sampling_enabled', on_change=self.__reset_results)
+        if not self.enabled:
+            return
+
+        columns = ['(uniforme)'] + self.__strata_columns()
+        st.sidebar.selectbox('Estratificar amostra pela coluna:', columns, key='sampling_target',
+                             on_change=self.__reset_results)
+
+        info = self.info()
+        if info is None:
+            return
+        st.sidebar.info(f"Amostra de {info['fraction']:.1%} da base ({info['sample_rows']} de {info['total_rows']} linhas)")
+
+        state = self.__state()
+        future: Optional[Future] = state['future']
+        if future is not None:
+            if future.done():
+                st.sidebar.button('Refinar amostra', on_click=self.__promote)
+            else:
+                st.sidebar.write('Calculando amostra maior em segundo plano...')
+        st.sidebar.button('Executar com a base completa', on_click=self.__use_full_data)
+
+    def __strata_columns(self) -> List[str]:
+        """
+        Colunas com poucos valores distintos, as únicas que fazem sentido para estratificar.
+        """
+        fingerprint = (frame_token('data'), self.full_data.shape)
+        cached = st.session_state.get('sampling_strata_columns')
+        if cached is None or cached[0] != fingerprint:
+            columns = [col for col in self.full_data.columns if self.full_data[col].nunique(dropna=False) <= MAX_STRATA]
+            cached = (fingerprint, columns)
+            st.session_state['sampling_strata_columns'] = cached
+        return cached[1]
+
+    def __state(self) -> Dict[str, Any]:
+        """
+        Estado da amostragem na sessão, recriado quando a base ou a estratificação mudam.
+        """
+        target = st.session_state.get('sampling_target', '(uniforme)')
+        stratify_column = target if target in self.__strata_columns() else None
+        fingerprint = (frame_token('data'), self.full_data.shape, stratify_column)
+        state = st.session_state.get('sampling_state')
+        if state is None or state['fingerprint'] != fingerprint:
+            self.__discard(state)
+            levels = sample_levels(len(self.full_data))
+            cancelled = threading.Event()
+            if levels:
+                _build_sample(session_id(), 'data_sample', self.full_data, stratify_column, levels[0], cancelled)
+            else:
+                release_frame('data_sample')
+            sample = load_frame('data_sample') if levels else None
+            state = {
+                'fingerprint': fingerprint,
+                # Identifica as amostras em segundo plano deste estado, que não podem ser confundidas com as de outro
+                'id': uuid.uuid4().hex,
+                'cancelled': cancelled,
+                'stratify_column': stratify_column,
+                'levels': levels,
+                'level': 0,
+                'current_rows': len(sample) if sample is not None else None,
+                'future': None,
+                'next_key': None,
+            }
+            st.session_state['sampling_state'] = state
+        return state
+
+    def __schedule_next(self, state: Dict[str, Any]) -> None:
+        next_level = state['level'] + 1
+        if state['future'] is None and next_level < len(state['levels']):
+            # A amostra seguinte fica sob o governador, numa chave própria do estado e do nível
+            state['next_key'] = f"data_sample_next_{state['id']}_{next_level}"
+            state['future'] = _executor.submit(_build_sample, session_id(), state['next_key'], self.full_data,
+                                               state['stratify_column'], state['levels'][next_level],
+                                               state['cancelled'])
+
+    @staticmethod
+    def __discard(state: Optional[Dict[str, Any]]) -> None:
+        """
+        Cancela a amostra em segundo plano de um estado descartado e libera o que ela já gravou.
+        """
+        if state is None:
+            return
+        state['cancelled'].set()
+        if state['future'] is not None:
+            state['future'].cancel()
+        if state['next_key'] is not None:
+            release_frame(state['next_key'])
+
+    @staticmethod
+    def __promote() -> None:
+        state = st.session_state.get('sampling_state')
+        if state is None or state['future'] is None or not state['future'].done():
+            return
+        sample = load_frame(state['next_key'])
+        if sample is None:
+            state['future'] = None
+            return
+        store_frame('data_sample', sample)
+        release_frame(state['next_key'])
+        state['next_key'] = None
+        state['current_rows'] = len(sample)
+        state['level'] += 1
+        state['future'] = None
+        # Resultados calculados sobre a amostra anterior deixam de valer
+        release_frame('processed_data')
+
+    @staticmethod
+    def __reset_results() -> None:
+        release_frame('processed_data')
+
+    @staticmethod
+    def __use_full_data() -> None:
+        st.session_state['sampling_enabled'] = False
+        SessionSampling.__discard(st.session_state.get('sampling_state'))
+        st.session_state['sampling_state'] = None
+        release_frame('data_sample')
+        release_frame('processed_data')
@@ -0,0 +1,291 @@
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from memory import session_id
+
+# Diretórios onde os modelos salvos e as predições em lote são gravados
+MODELS_DIR = 'saved_models'
+SCORING_OUTPUT_DIR = 'scoring_output'
+# Único diretório do servidor de onde CSVs podem ser pontuados sem upload
+SCORING_INPUT_DIR = os.environ.get('COOPERGEST_SCORING_INPUT_DIR', 'scoring_input')
+
+
+class ScoringArtifact:
+    """
+    Modelo treinado junto com o pré-processamento ajustado (scalers, vocabulário do encoder
+    e ordem das colunas), suficiente para pontuar dados novos com as mesmas transformações.
+    """
+
+    def __init__(self, model: Any, target_column: str, feature_columns: List[str],
+                 preprocessing_state: Dict[str, Any], model_name: str, dataset_name: str) -> None:
+        self.model: Any = model
+        self.target_column: str = target_column
+        self.feature_columns: List[str] = feature_columns
+        self.numerical_columns: List[str] = list(preprocessing_state.get('numerical_columns', []))
+        self.categorical_columns: List[str] = list(preprocessing_state.get('categorical_columns', []))
+        self.scalers: Dict[str, Any] = dict(preprocessing_state.get('scalers', {}))
+        self.encoder: Any = preprocessing_state.get('encoder')
+        self.model_name: str = model_name
+        self.dataset_name: str = dataset_name
+        self.created_at: datetime = datetime.utcnow()
+
+    def transform(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aplica o pré-processamento ajustado a um bloco de dados brutos.
+
+        Colunas ausentes são tratadas como vazias e categorias inéditas viram vetores nulos
+        no one-hot, de modo que o resultado sempre tem as colunas e a ordem do treino.
+
+        Args:
+            chunk (pd.DataFrame): Bloco de dados brutos.
+
+        Returns:
+            pd.DataFrame: Matriz de features na ordem usada no treinamento.
+        """
+        parts: List[pd.DataFrame] = []
+
+        if self.numerical_columns:
+            numerical_df = chunk.reindex(columns=self.numerical_columns)
+            for col in self.numerical_columns:
+                values = numerical_df[col]
+                if values.dtype == object:
+                    values = values.replace({'True': 1, 'False': 0, True: 1, False: 0})
+                values = pd.to_numeric(values, errors='coerce').astype(float).fillna(0.0)
+                scaler = self.scalers.get(col)
+                if scaler is not None:
+                    values = pd.Series(scaler.transform(values.to_frame(col)).ravel(), index=chunk.index)
+                numerical_df[col] = values
+            parts.append(numerical_df)
+
+        if self.categorical_columns and self.encoder is not None:
+            categorical_df = chunk.reindex(columns=self.categorical_columns).astype(object)
+            categorical_df = categorical_df.where(categorical_df.notna(), np.nan)
+            encoded = pd.DataFrame(self.encoder.transform(categorical_df),
+                                   columns=self.encoder.get_feature_names_out(self.categorical_columns),
+                                   index=chunk.index)
+            parts.append(encoded)
+
+        features = pd.concat(parts, axis=1) if parts else pd.DataFrame(index=chunk.index)
+        # Uma feature que o estado não produz indica pré-processamento desatualizado; não é preenchida com zeros
+        return features[self.feature_columns]
+
+    def missing_features(self) -> List[str]:
+        """
+        Colunas usadas pelo modelo que o pré-processamento salvo não consegue produzir.
+        """
+        produced = list(self.numerical_columns)
+        if self.categorical_columns and self.encoder is not None:
+            produced += list(self.encoder.get_feature_names_out(self.categorical_columns))
+        return [col for col in self.feature_columns if col not in set(produced)]
+
+    def predict(self, chunk: pd.DataFrame) -> np.ndarray:
+        """
+        Pontua um bloco de dados brutos. Se a coluna alvo foi normalizada no pré-processamento,
+        as predições voltam para a escala original.
+        """
+        predictions = self.model.predict(self.transform(chunk))
+        target_scaler = self.scalers.get(self.target_column)
+        if target_scaler is not None and hasattr(target_scaler, 'inverse_transform') \
+                and np.issubdtype(predictions.dtype, np.number):
+            predictions = target_scaler.inverse_transform(
+                pd.DataFrame({self.target_column: predictions})
+            ).ravel()
+        return predictions
+
+    def save(self, directory: str = MODELS_DIR) -> str:
+        """
+        Persiste o artefato em disco.
+
+        Returns:
+            str: Caminho do arquivo gerado.
+        """
+        os.makedirs(directory, exist_ok=True)
+        name = f"{self.dataset_name}_{self.model_name}_{self.target_column}_{self.created_at:%Y%m%d%H%M%S}"
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+        path = os.path.join(directory, f"{name}.joblib")
+        joblib.dump(self, path)
+        return path
+
+    @staticmethod
+    def load(path: str) -> 'ScoringArtifact':
+        return joblib.load(path)
+
+
+class BatchScorer:
+    """
+    Pontua um CSV em blocos de tamanho fixo, gravando as predições de forma incremental.
+    O uso de memória depende apenas do tamanho do bloco, não do tamanho do arquivo.
+    """
+
+    def __init__(self, artifact: ScoringArtifact, chunk_size: int = 50_000) -> None:
+        self.artifact: ScoringArtifact = artifact
+        self.chunk_size: int = chunk_size
+
+    def score_csv(self, source: Any, destination: str, output_format: str = 'parquet',
+                  key_columns: Optional[List[str]] = None,
+                  progress_callback: Optional[Callable[[int, float], None]] = None) -> Dict[str, Any]:
+        """
+        Lê o CSV em blocos, aplica o pré-processamento e o modelo e grava as predições.
+
+        Args:
+            source (Any): Caminho ou arquivo CSV.
+            destination (str): Caminho do arquivo de saída.
+            output_format (str): 'parquet' ou 'csv'.
+            key_columns (Optional[List[str]]): Colunas copiadas da entrada para identificar cada predição.
+            progress_callback (Optional[Callable[[int, float], None]]): Recebe linhas processadas e tempo decorrido.
+
+        Returns:
+            Dict[str, Any]: Linhas pontuadas, tempo total e vazão (linhas/s).
+        """
+        key_columns = key_columns or []
+        # Tipos fixos evitam que a inferência por bloco mude o tipo de uma coluna entre blocos
+        dtypes = {col: str for col in self.artifact.categorical_columns + key_columns}
+        reader = pd.read_csv(source, chunksize=self.chunk_size, dtype=dtypes)
+
+        if os.path.exists(destination):
+            os.remove(destination)
+        writer: Optional[pq.ParquetWriter] = None
+        total_rows = 0
+        start = time.monotonic()
+        try:
+            for chunk in reader:
+                output = chunk.reindex(columns=key_columns)
+                output['prediction'] = self.artifact.predict(chunk)
+
+                if output_format == 'parquet':
+                    if writer is None:
+                        table = pa.Table.from_pandas(output, preserve_index=False)
+                        writer = pq.ParquetWriter(destination, table.schema)
+                    else:
+                        table = pa.Table.from_pandas(output, schema=writer.schema, preserve_index=False)
+                    writer.write_table(table)
+                else:
+                    output.to_csv(destination, mode='a', header=total_rows == 0, index=False)
+
+                total_rows += len(chunk)
+                if progress_callback is not None:
+                    progress_callback(total_rows, time.monotonic() - start)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        elapsed = time.monotonic() - start
+        return {
+            'rows': total_rows,
+            'seconds': round(elapsed, 2),
+            'rows_per_second': round(total_rows / elapsed, 1) if elapsed > 0 else None,
+            'destination': destination,
+        }
+
+
+class ScoringDashboard:
+    """
+    Página para pontuar novos CSVs com um modelo salvo.
+    """
+
+    @staticmethod
+    def __list_models() -> List[str]:
+        if not os.path.isdir(MODELS_DIR):
+            return []
+        return sorted((f for f in os.listdir(MODELS_DIR) if f.endswith('.joblib')), reverse=True)
+
+    @staticmethod
+    def __list_inputs() -> List[str]:
+        if not os.path.isdir(SCORING_INPUT_DIR):
+            return []
+        return sorted(f for f in os.listdir(SCORING_INPUT_DIR)
+                      if f.lower().endswith('.csv') and ScoringDashboard.__input_path(f) is not None)
+
+    @staticmethod
+    def __input_path(file_name: str) -> Optional[str]:
+        """
+        Caminho do CSV dentro de SCORING_INPUT_DIR, ou None se ele (inclusive por link simbólico) estiver fora.
+        """
+        root = os.path.realpath(SCORING_INPUT_DIR)
+        path = os.path.realpath(os.path.join(root, file_name))
+        if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+            return None
+        return path
+
+    def run(self) -> None:
+        """
+        Executa a página de pontuação em lote.
+        """
+        try:
+            st.title('Pontuação em Lote')
+            models = self.__list_models()
+            if not models:
+                st.write("Nenhum modelo salvo. Treine um modelo em 'Processamento com IA' e clique em 'Salvar Modelo'.")
+                return
+
+            model_file: str = st.selectbox('Selecione o modelo salvo:', models)
+            artifact = ScoringArtifact.load(os.path.join(MODELS_DIR, model_file))
+            st.write(f"Modelo: {artifact.model_name} | Coluna alvo: {artifact.target_column} | Base: {artifact.dataset_name}")
+
+            # Um CSV do servidor é lido em blocos direto do disco, sem passar pelo limite de upload
+            source_type: str = st.radio('Origem do CSV:', ('Arquivo no servidor', 'Upload'), key='scoring_source')
+            file: Any = None
+            file_name = ''
+            if source_type == 'Arquivo no servidor':
+                inputs = self.__list_inputs()
+                if not inputs:
+                    st.write(f"Nenhum CSV em '{SCORING_INPUT_DIR}' no servidor. Copie o arquivo para esse diretório "
+                             f"(configurável em COOPERGEST_SCORING_INPUT_DIR) ou use o upload.")
+                else:
+                    file_name = st.selectbox(f"CSV em '{SCORING_INPUT_DIR}':", inputs, key='scoring_path')
+                    file = self.__input_path(file_name)
+            else:
+                file = st.file_uploader('Upload do CSV a ser pontuado', type='csv', key='scoring_file')
+                file_name = file.name if file is not None else ''
+            chunk_size: int = int(st.number_input('Linhas por bloco:', min_value=1_000, max_value=1_000_000,
+                                                  value=50_000, step=1_000))
+            output_format: str = st.selectbox('Formato de saída:', ('parquet', 'csv'))
+            key_columns: List[str] = []
+            if file is not None:
+                header = pd.read_csv(file, nrows=0).columns.tolist()
+                if hasattr(file, 'seek'):
+                    file.seek(0)
+                key_columns = st.multiselect('Colunas de identificação copiadas para a saída:', header)
+
+            if file is not None and st.button('Pontuar'):
+                os.makedirs(SCORING_OUTPUT_DIR, exist_ok=True)
+                base_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', os.path.splitext(os.path.basename(file_name))[0])
+                # Horário e sessão no nome: sessões que pontuam arquivos de mesmo nome não sobrescrevem umas às outras
+                destination = os.path.join(
+                    SCORING_OUTPUT_DIR,
+                    f"{base_name}_{datetime.now():%Y%m%d%H%M%S}_{session_id()[:8]}_predictions.{output_format}"
+                )
+                progress = st.empty()
+
+                def report_progress(rows: int, elapsed: float) -> None:
+                    progress.write(f"{rows} linhas pontuadas ({rows / elapsed if elapsed > 0 else 0:.0f} linhas/s)")
+
+                stats = BatchScorer(artifact, chunk_size).score_csv(
+                    file, destination, output_format, key_columns, report_progress
+                )
+                st.session_state['scoring_result'] = stats
+
+            # O resultado fica na sessão para o download continuar disponível nas próximas interações
+            result: Optional[Dict[str, Any]] = st.session_state.get('scoring_result')
+            if result is not None and os.path.isfile(result['destination']):
+                st.write(f"Predições gravadas em {result['destination']}")
+                st.write(f"{result['rows']} linhas em {result['seconds']}s ({result['rows_per_second']} linhas/s)")
+                with open(result['destination'], 'rb') as output:
+                    st.download_button(
+                        label='Baixar Predições',
+                        data=output,
+                        file_name=os.path.basename(result['destination']),
+                        mime='application/octet-stream' if result['destination'].endswith('.parquet') else 'text/csv'
+                    )
+        except Exception as e:
+            st.error(f"Erro na pontuação em lote: {e}")
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from dedup import NEAR, DuplicateDetector  # noqa: E402
+
+
+def test_chained_rows_are_kept_below_threshold():
+    # Cada linha difere da anterior em uma coluna a mais: a cadeia liga todas, mas a última
+    # linha tem só 7 de 10 colunas iguais à primeira
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, 1000, (50, 10))
+    chain = np.repeat(rows[:1], 4, axis=0)
+    for step in range(1, 4):
+        chain[step:, step - 1] = -step
+    df = pd.DataFrame(np.vstack([rows, chain[1:]]))
+
+    detector = DuplicateDetector(mode=NEAR, threshold=0.8).fit(df)
+
+    codes = np.column_stack([pd.factorize(df[col])[0] for col in df.columns])
+    removed = np.flatnonzero(detector.duplicated_)
+    equal = (codes[removed] == codes[detector.representative_[removed]]).sum(axis=1)
+    assert (equal >= 8).all()
+    assert not detector.duplicated_[detector.representative_].any()
+    assert detector.duplicated_.sum() == 2
+    assert len(detector.drop(df)) == len(df) - 2
+    assert detector.clusters()['Tamanho'].tolist() == [4]
+
+
+def test_clusters_list_rows_by_index_label():
+    df = pd.DataFrame({'a': [1, 2, 1, 3, 1, 2], 'b': [0, 0, 0, 0, 0, 0]}, index=[10, 11, 12, 13, 14, 15])
+
+    report = DuplicateDetector().fit(df).clusters(max_rows=2)
+
+    assert report['Tamanho'].tolist() == [3, 2]
+    assert report['Removidas'].tolist() == [2, 1]
+    assert report['Linhas mantidas'].tolist() == [[10], [11]]
+    assert report['Linhas'].tolist() == [[10, 12], [11, 15]]
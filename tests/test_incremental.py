@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from incremental import IncrementalTrainer  # noqa: E402
+
+
+def test_null_in_integer_column_only_changes_its_row(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    v1 = pd.DataFrame({
+        'idade': rng.integers(18, 80, 500),
+        'ativo': rng.random(500) > 0.5,
+        'segmento': rng.choice(['a', 'b'], 500),
+    })
+    v1['saldo'] = v1['idade'] * 2.0
+    # Na nova exportação um nulo transforma a coluna inteira em float e a booleana em object
+    v2 = v1.astype({'idade': float, 'ativo': object})
+    v2.loc[5, 'idade'] = np.nan
+    v2.loc[7, 'ativo'] = None
+
+    trainer = IncrementalTrainer('base', 'SGD Regressor', 'saldo', is_regression=True)
+    assert trainer.update(v1)['delta_rows'] == 500
+    assert trainer.update(v2)['delta_rows'] == 2
+    assert trainer.update(v2)['delta_rows'] == 0
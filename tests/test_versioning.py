@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+CLEANING_METHODS = [
+    ['nenhum'],
+    ['Remover linhas com valores nulos', 'Remover linhas duplicadas'],
+    ['Remover linhas com valores nulos', 'Remover linhas duplicadas', 'Remover ruídos'],
+]
+SCALERS = {'nenhum': None, 'StandardScaler': StandardScaler, 'MinMaxScaler': MinMaxScaler}
+
+
+def _versions():
+    rng = np.random.default_rng(0)
+    n_rows = 2000
+    v1 = pd.DataFrame({
+        'id': np.arange(n_rows),
+        # Média alta e desvio pequeno: somas de quadrados perdem a precisão da variância
+        'saldo': 1e9 + rng.normal(0, 1, n_rows),
+        'idade': rng.integers(18, 80, n_rows).astype(float),
+        'segmento': rng.choice(['a', 'b', 'c'], n_rows),
+    })
+    v1.loc[[5, 6], 'saldo'] = 1e9 + 10
+    v1.loc[7, 'idade'] = np.nan
+    v1.loc[9, 'segmento'] = None
+
+    v2 = v1.drop(index=range(100, 300))
+    extra = v1.iloc[:50].assign(id=lambda d: d['id'] + n_rows)
+    v2 = pd.concat([v2, extra], ignore_index=True)
+    v2.loc[0, 'saldo'] = 1e9 + 2.5
+    v2.loc[1, 'segmento'] = 'd'
+    # A terceira versão volta ao conteúdo da primeira
+    return v1, v2, v1
+
+
+@pytest.fixture(scope='module')
+def workdir(tmp_path_factory):
+    # Banco e linhagem usam caminhos relativos, criados no diretório de trabalho na importação
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(tmp_path_factory.mktemp('versioning'))
+        yield
+
+
+@pytest.mark.parametrize('cleaning_methods', CLEANING_METHODS)
+@pytest.mark.parametrize('scaler_name', list(SCALERS))
+def test_incremental_matches_full_preprocessing(workdir, cleaning_methods, scaler_name):
+    from preprocessing import Preprocessing
+    from versioning import DatasetLineage, IncrementalPreprocessing
+
+    lineage = DatasetLineage(f"{scaler_name}_{len(cleaning_methods)}.csv")
+    reprocessed = []
+    for df in _versions():
+        version = lineage.register(df)
+        full = Preprocessing(df)
+        full.scaler = scaler_name
+        full.cleaning_methods = cleaning_methods
+        expected = full._Preprocessing__apply_preprocessing()
+
+        scaler = SCALERS[scaler_name]
+        incremental = IncrementalPreprocessing(lineage.dataset_name, version.key_column, scaler_name, cleaning_methods)
+        result, _, info = incremental.run(df, version.version, scaler() if scaler else None)
+        reprocessed.append(info['reprocessed_rows'])
+
+        assert list(result.columns) == list(expected.columns)
+        assert result.index.equals(expected.index)
+        np.testing.assert_allclose(result.to_numpy(dtype=float), expected.to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-9)
+
+    # Só as 50 linhas novas e as 2 alteradas são reprocessadas; na volta, as 200 removidas e as 2 alteradas
+    assert reprocessed == [2000, 52, 202]
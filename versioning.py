@@ -0,0 +1,355 @@
+import hashlib
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.base import clone
+from sklearn.preprocessing import OneHotEncoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from models import TBDatasetVersions
+
+engine = create_engine('sqlite:///actions.db')
+Session = sessionmaker(bind=engine)
+session = Session()
+
+# Diretório com os hashes de linha de cada versão e os caches de pré-processamento
+LINEAGE_DIR = 'lineage'
+
+CLEAN_NULL = 'Remover linhas com valores nulos'
+CLEAN_DUPLICATES = 'Remover linhas duplicadas'
+CLEAN_NOISE = 'Remover ruídos'
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+
+
+def detect_key_column(df: pd.DataFrame) -> Optional[str]:
+    """
+    Retorna a primeira coluna sem nulos e com valores únicos, usada para identificar linhas alteradas.
+    """
+    for col in df.columns:
+        values = df[col]
+        if values.notna().all() and values.is_unique:
+            return col
+    return None
+
+
+def row_keys(df: pd.DataFrame, key_column: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula a chave e o hash de conteúdo de cada linha.
+
+    Sem coluna chave, a chave é o próprio hash combinado com a ocorrência da linha, o que mantém
+    linhas idênticas distinguíveis; nesse caso uma alteração aparece como remoção mais inclusão.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Chaves e hashes de conteúdo, ambos uint64.
+    """
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    if key_column is not None:
+        keys = pd.util.hash_pandas_object(df[key_column], index=False).to_numpy()
+    else:
+        occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+        keys = pd.util.hash_pandas_object(pd.DataFrame({'hash': hashes, 'occurrence': occurrence}),
+                                          index=False).to_numpy()
+    return keys, hashes
+
+
+class DatasetLineage:
+    """
+    Histórico de versões de um dataset, identificado pelo nome do arquivo enviado.
+    Cada versão guarda o hash de cada linha, permitindo calcular as linhas novas,
+    removidas e alteradas em relação à versão anterior.
+    """
+
+    def __init__(self, dataset_name: str) -> None:
+        self.dataset_name: str = dataset_name
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(LINEAGE_DIR, _safe_name(self.dataset_name))
+
+    def latest(self) -> Optional[TBDatasetVersions]:
+        return session.query(TBDatasetVersions)\
+                      .filter(TBDatasetVersions.dataset_name == self.dataset_name)\
+                      .order_by(TBDatasetVersions.version.desc()).first()
+
+    def versions(self) -> List[TBDatasetVersions]:
+        return session.query(TBDatasetVersions)\
+                      .filter(TBDatasetVersions.dataset_name == self.dataset_name)\
+                      .order_by(TBDatasetVersions.version).all()
+
+    def register(self, df: pd.DataFrame) -> TBDatasetVersions:
+        """
+        Registra o conteúdo enviado como nova versão do dataset, a menos que seja idêntico à última.
+
+        Args:
+            df (pd.DataFrame): Conteúdo completo do arquivo enviado.
+
+        Returns:
+            TBDatasetVersions: Versão correspondente ao conteúdo.
+        """
+        latest = self.latest()
+        key_column = latest.key_column if latest is not None and latest.key_column in df.columns else None
+        if key_column is None or not (df[key_column].notna().all() and df[key_column].is_unique):
+            key_column = detect_key_column(df)
+        keys, hashes = row_keys(df, key_column)
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(list(df.columns)).encode())
+        digest.update(hashes.tobytes())
+        content_hash = digest.hexdigest()
+        if latest is not None and latest.content_hash == content_hash:
+            return latest
+
+        added, removed, changed = len(keys), 0, 0
+        previous_path = self.__hashes_path(latest.version) if latest is not None else None
+        if previous_path is not None and os.path.exists(previous_path):
+            previous = pd.read_parquet(previous_path)
+            previous_hashes = pd.Series(previous['row_hash'].to_numpy(), index=previous['key'].to_numpy())
+            in_previous = np.isin(keys, previous_hashes.index.to_numpy())
+            added = int((~in_previous).sum())
+            removed = int((~np.isin(previous_hashes.index.to_numpy(), keys)).sum())
+            if key_column is not None and key_column == latest.key_column:
+                changed = int((previous_hashes.reindex(keys[in_previous]).to_numpy() != hashes[in_previous]).sum())
+
+        version = TBDatasetVersions(
+            dataset_name=self.dataset_name,
+            version=latest.version + 1 if latest is not None else 1,
+            content_hash=content_hash,
+            key_column=key_column,
+            total_rows=len(df),
+            added_rows=added,
+            removed_rows=removed,
+            changed_rows=changed,
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        pd.DataFrame({'key': keys, 'row_hash': hashes}).to_parquet(self.__hashes_path(version.version))
+        session.add(version)
+        session.commit()
+        return version
+
+    def stored_row_keys(self, version: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Chaves e hashes de conteúdo das linhas de uma versão registrada, na ordem das linhas, ou None se não houver.
+        """
+        path = self.__hashes_path(version)
+        if not os.path.exists(path):
+            return None
+        stored = pd.read_parquet(path)
+        return stored['key'].to_numpy(), stored['row_hash'].to_numpy()
+
+    def __hashes_path(self, version: int) -> str:
+        return os.path.join(self.directory, f"v{version}.parquet")
+
+
+class _PreprocessingCache:
+    """
+    Códigos das colunas categóricas de uma versão, na ordem das linhas dessa versão.
+
+    As chaves e os hashes das linhas já ficam nos arquivos da linhagem, então o cache guarda
+    apenas o que custa caro recalcular: o código de cada valor categórico no vocabulário.
+    """
+
+    def __init__(self, categorical_columns: List[str]) -> None:
+        self.categorical_columns: List[str] = categorical_columns
+        self.version: Optional[int] = None
+        # Valores distintos de cada coluna, na ordem em que apareceram
+        self.vocabulary: Dict[str, pd.Index] = {col: pd.Index([], dtype=object) for col in categorical_columns}
+        self.codes: Dict[str, np.ndarray] = {col: np.array([], dtype=np.int32) for col in categorical_columns}
+
+
+class IncrementalPreprocessing:
+    """
+    Pré-processamento de um dataset versionado que reprocessa apenas as linhas novas ou alteradas.
+
+    As linhas da versão são alinhadas às da versão anterior pelas chaves ordenadas, e só as linhas
+    novas ou alteradas têm seus valores categóricos codificados; as demais reaproveitam os códigos
+    do cache. A limpeza de nulos e de duplicadas usa os hashes de linha da linhagem, e o Z-Score e
+    os scalers são ajustados de forma vetorizada sobre as linhas mantidas, como no pré-processamento
+    completo: somas acumuladas entre versões perderiam precisão em colunas com valores grandes.
+    """
+
+    def __init__(self, dataset_name: str, key_column: Optional[str], scaler_name: str,
+                 cleaning_methods: List[str]) -> None:
+        self.dataset_name: str = dataset_name
+        self.key_column: Optional[str] = key_column
+        self.scaler_name: str = scaler_name
+        # Como em Preprocessing, 'nenhum' desativa todos os métodos de limpeza
+        self.cleaning_methods: List[str] = [] if 'nenhum' in cleaning_methods else list(cleaning_methods)
+
+    @staticmethod
+    def supports(cleaning_methods: List[str]) -> bool:
+        """
+        A remoção de ruídos depende das demais linhas, então só pode ser feita incrementalmente como último passo.
+        """
+        return 'nenhum' in cleaning_methods or CLEAN_NOISE not in cleaning_methods or cleaning_methods[-1] == CLEAN_NOISE
+
+    @property
+    def path(self) -> str:
+        # Os códigos não dependem do scaler nem da limpeza, então o cache é um só por coluna chave
+        digest = hashlib.blake2b(str(self.key_column).encode(), digest_size=8).hexdigest()
+        return os.path.join(LINEAGE_DIR, _safe_name(self.dataset_name), f"categorical_codes_{digest}.joblib")
+
+    def run(self, df: pd.DataFrame, version: int, scaler: Optional[Any]) -> Tuple[pd.DataFrame, Dict[str, Any], Dict[str, int]]:
+        """
+        Atualiza o cache com a versão recebida e monta o DataFrame pré-processado.
+
+        Args:
+            df (pd.DataFrame): Conteúdo completo da versão.
+            version (int): Número da versão em TBDatasetVersions.
+            scaler (Optional[Any]): Scaler não ajustado, ou None para não normalizar.
+
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, Any], Dict[str, int]]: Dados pré-processados, estado ajustado
+            (no formato de Preprocessing.fitted_state) e contagem de linhas reprocessadas.
+        """
+        numerical_columns = df.select_dtypes(exclude=['object']).columns.tolist()
+        categorical_columns = df.select_dtypes(include=['object']).columns.tolist()
+        lineage = DatasetLineage(self.dataset_name)
+        stored = lineage.stored_row_keys(version)
+        keys, hashes = stored if stored is not None and len(stored[0]) == len(df) else row_keys(df, self.key_column)
+
+        cache = self.__load_cache()
+        if cache is None or cache.categorical_columns != categorical_columns:
+            cache = _PreprocessingCache(categorical_columns)
+        fresh = self.__update_codes(cache, lineage, df, keys, hashes)
+        if cache.version != version or fresh.any():
+            cache.version = version
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            joblib.dump(cache, self.path)
+
+        final_df, state = self.__assemble(cache, df, hashes, numerical_columns, scaler)
+        return final_df, state, {'reprocessed_rows': int(fresh.sum()), 'total_rows': len(df)}
+
+    def __load_cache(self) -> Optional[_PreprocessingCache]:
+        if not os.path.exists(self.path):
+            return None
+        cache = joblib.load(self.path)
+        return cache if isinstance(cache, _PreprocessingCache) else None
+
+    def __update_codes(self, cache: _PreprocessingCache, lineage: DatasetLineage, df: pd.DataFrame,
+                       keys: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+        """
+        Alinha os códigos do cache às linhas da nova versão e codifica apenas as linhas novas ou alteradas.
+
+        Returns:
+            np.ndarray: Máscara das linhas reprocessadas.
+        """
+        fresh = np.ones(len(df), dtype=bool)
+        codes = {col: np.empty(len(df), dtype=np.int32) for col in cache.categorical_columns}
+        previous = lineage.stored_row_keys(cache.version) if cache.version is not None else None
+        previous_rows = len(next(iter(cache.codes.values()))) if cache.codes else None
+        if previous is not None and (previous_rows is None or previous_rows == len(previous[0])):
+            previous_keys, previous_hashes = previous
+            previous_positions = self.__align(previous_keys, keys)
+            matched = previous_positions >= 0
+            fresh[matched] = previous_hashes[previous_positions[matched]] != hashes[matched]
+            for col in cache.categorical_columns:
+                codes[col][~fresh] = cache.codes[col][previous_positions[~fresh]]
+
+        for col in cache.categorical_columns:
+            values = df[col][fresh].to_numpy(dtype=object)
+            # Como no OneHotEncoder, valores nulos formam uma única categoria NaN
+            values[pd.isna(values)] = np.nan
+            vocabulary = cache.vocabulary[col]
+            unique = pd.Index(pd.unique(values), dtype=object)
+            vocabulary = vocabulary.append(unique[~unique.isin(vocabulary)])
+            cache.vocabulary[col] = vocabulary
+            codes[col][fresh] = vocabulary.get_indexer(values)
+        cache.codes = codes
+        return fresh
+
+    @staticmethod
+    def __align(previous_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """
+        Posição de cada chave na versão anterior, ou -1 se ela não existia.
+
+        Exportações sucessivas costumam manter a ordem das linhas, então as chaves são comparadas
+        primeiro posição a posição; só as que não coincidem são procuradas numa tabela de hash.
+        """
+        positions = np.full(len(keys), -1, dtype=np.int64)
+        common = min(len(keys), len(previous_keys))
+        same = np.flatnonzero(previous_keys[:common] == keys[:common])
+        positions[same] = same
+        moved = np.flatnonzero(positions < 0)
+        if len(moved) and len(previous_keys):
+            positions[moved] = pd.Index(previous_keys).get_indexer(keys[moved])
+        return positions
+
+    def __assemble(self, cache: _PreprocessingCache, df: pd.DataFrame, hashes: np.ndarray,
+                   numerical_columns: List[str], scaler: Optional[Any]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Monta o resultado na ordem original das linhas, aplicando limpeza, Z-Score, normalização e one-hot.
+        """
+        kept = np.ones(len(df), dtype=bool)
+        if CLEAN_NULL in self.cleaning_methods:
+            kept &= ~df.isna().any(axis=1).to_numpy()
+        if CLEAN_DUPLICATES in self.cleaning_methods:
+            # Linhas idênticas têm o mesmo hash; mantém a primeira ocorrência, como o drop_duplicates
+            duplicated = pd.Series(hashes[kept]).duplicated().to_numpy()
+            kept[np.flatnonzero(kept)[duplicated]] = False
+        positions = np.flatnonzero(kept)
+        numerical_df = df[numerical_columns] if kept.all() else df[numerical_columns].iloc[positions]
+
+        if CLEAN_NOISE in self.cleaning_methods:
+            numerical_df = numerical_df.copy()
+            bool_columns = numerical_df.select_dtypes(include=['bool']).columns
+            numerical_df[bool_columns] = numerical_df[bool_columns].astype(int)
+            inliers = np.asarray((np.abs(stats.zscore(numerical_df)) < 3).all(axis=1))
+            numerical_df = numerical_df[inliers]
+            positions = positions[inliers]
+
+        scalers: Dict[str, Any] = {}
+        if scaler is not None and not numerical_df.empty:
+            numerical_df = numerical_df.copy()
+            for col in numerical_df.columns:
+                column_scaler = clone(scaler)
+                numerical_df[col] = column_scaler.fit_transform(numerical_df[[col]])
+                scalers[col] = column_scaler
+
+        # Só entram categorias presentes nas linhas finais, na ordem usada pelo OneHotEncoder
+        encoder: Optional[OneHotEncoder] = None
+        if cache.categorical_columns and len(positions):
+            categories: List[np.ndarray] = []
+            columns: List[np.ndarray] = []
+            for col in cache.categorical_columns:
+                codes = cache.codes[col][positions]
+                vocabulary = cache.vocabulary[col]
+                present = np.flatnonzero(np.bincount(codes, minlength=len(vocabulary)))
+                present = np.array(sorted(present, key=lambda code: self.__category_order(vocabulary[code])), dtype=np.int64)
+                rank = np.empty(len(vocabulary), dtype=np.int64)
+                rank[present] = np.arange(len(present))
+                categories.append(np.array(list(vocabulary[present]), dtype=object))
+                columns.append(rank[codes])
+            # Uma única matriz recebe o one-hot de todas as colunas, sem blocos intermediários
+            offsets = np.cumsum([0] + [len(values) for values in categories[:-1]])
+            encoded = np.zeros((len(positions), sum(len(values) for values in categories)))
+            rows = np.arange(len(positions))
+            for offset, column in zip(offsets, columns):
+                encoded[rows, offset + column] = 1.0
+            names = [f"{col}_{category}" for col, values in zip(cache.categorical_columns, categories) for category in values]
+            encoder = OneHotEncoder(categories=categories, sparse_output=False, handle_unknown='ignore')
+            encoder.fit(pd.DataFrame([[values[0] for values in categories]], columns=cache.categorical_columns))
+            encoded_df = pd.DataFrame(encoded, columns=names, index=numerical_df.index)
+            final_df = pd.concat([numerical_df, encoded_df], axis=1)
+        else:
+            final_df = numerical_df
+
+        state = {
+            'numerical_columns': numerical_columns,
+            'categorical_columns': cache.categorical_columns,
+            'scalers': scalers,
+            'encoder': encoder,
+        }
+        return final_df, state
+
+    @staticmethod
+    def __category_order(category: Any) -> Tuple[bool, str]:
+        # O OneHotEncoder ordena as categorias e coloca NaN por último
+        return (not isinstance(category, str), str(category))